@@ -1,10 +1,28 @@
 """NIPCA Component."""
 import asyncio
+import logging
 from datetime import timedelta
+from functools import partial
 
 from homeassistant import config_entries, core
-from homeassistant.const import CONF_SCAN_INTERVAL
-from .const import NIPCA_DOMAIN
+from homeassistant.const import CONF_SCAN_INTERVAL, CONF_URL
+from httpx import HTTPError
+from xml.etree.ElementTree import ParseError
+from .const import CONF_ATTRIBUTES, CONNECTION_OPTIONS, NIPCA_DOMAIN, UPNP_DEVICE_TYPE
+from .nipca import NipcaDevice
+from .services import async_setup_services
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_entry_config(entry: config_entries.ConfigEntry) -> dict:
+    """Merge entry data and options into the device config."""
+    hass_data = dict(entry.data)
+    hass_data.update(entry.options)
+
+    if scan_interval := hass_data.pop(CONF_SCAN_INTERVAL):
+        hass_data[CONF_SCAN_INTERVAL] = timedelta(seconds=scan_interval)
+    return hass_data
 
 
 async def async_setup_entry(
@@ -12,18 +30,84 @@ async def async_setup_entry(
 ) -> bool:
     """Set up platform from a ConfigEntry."""
     hass.data.setdefault(NIPCA_DOMAIN, {})
-    hass_data = dict(entry.data)
+    device = NipcaDevice(hass, get_entry_config(entry), entry.entry_id)
+    device.update_attributes(entry.data.get(CONF_ATTRIBUTES, {}))
+    hass.data[NIPCA_DOMAIN][entry.entry_id] = device
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
-    if scan_interval := hass_data.pop(CONF_SCAN_INTERVAL):
-        hass_data[CONF_SCAN_INTERVAL] = timedelta(seconds=scan_interval)
+    if "ssdp" in hass.config.components:
+        from homeassistant.components import ssdp
 
-    hass.data[NIPCA_DOMAIN][entry.entry_id] = hass_data
+        entry.async_on_unload(
+            await ssdp.async_register_callback(
+                hass,
+                partial(async_ssdp_discovered, hass, entry),
+                {"deviceType": UPNP_DEVICE_TYPE},
+            )
+        )
 
     # Forward the setup to the sensor platform.
     await hass.config_entries.async_forward_entry_setups(entry, ["binary_sensor", "camera"])
+
+    # Entities start unavailable and the camera is probed in the background,
+    # so an unreachable camera does not hold up startup.
+    entry.async_create_background_task(
+        hass, async_probe_device(hass, entry, device), f"nipca_{entry.entry_id}_probe"
+    )
     return True
 
 
+async def async_probe_device(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry, device: NipcaDevice
+) -> None:
+    """Probe the device and remember its attributes for the next startup."""
+    if await device.async_probe() and device._attributes != entry.data.get(
+        CONF_ATTRIBUTES
+    ):
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_ATTRIBUTES: dict(device._attributes)}
+        )
+
+
+async def async_update_options(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Apply changed options to the running device, reloading only if needed."""
+    device = hass.data[NIPCA_DOMAIN][entry.entry_id]
+    config = get_entry_config(entry)
+    if any(config.get(key) != device.config.get(key) for key in CONNECTION_OPTIONS):
+        await hass.config_entries.async_reload(entry.entry_id)
+    else:
+        device.apply_options(config)
+
+
+async def async_ssdp_discovered(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry, info, change
+) -> None:
+    """Move the device to the location it announces, e.g. after an IP change."""
+    device = hass.data[NIPCA_DOMAIN].get(entry.entry_id)
+    location = info.ssdp_location
+    if (
+        device is None
+        or not location
+        or location == device.config[CONF_URL]
+        or not device.matches_discovery(info.upnp)
+    ):
+        return
+
+    _LOGGER.info("NIPCA device %s moved to %s", entry.title, location)
+    try:
+        await device.async_update_location(
+            location, info.upnp.get("presentationURL")
+        )
+    except (ConnectionError, HTTPError, ParseError) as error:
+        _LOGGER.warning("NIPCA device %s location error: %s", entry.title, error)
+        return
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_URL: location}
+    )
+
+
 async def async_unload_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
 ) -> bool:
@@ -37,9 +121,10 @@ async def async_unload_entry(
         )
     )
 
-    # Remove config entry from domain.
+    # Remove config entry from domain and release the device.
     if unload_ok:
-        hass.data[NIPCA_DOMAIN].pop(entry.entry_id)
+        device = hass.data[NIPCA_DOMAIN].pop(entry.entry_id)
+        await device.async_stop()
 
     return unload_ok
 
@@ -47,4 +132,5 @@ async def async_unload_entry(
 async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
     """Set up the NIPCA component from yaml configuration."""
     hass.data.setdefault(NIPCA_DOMAIN, {})
+    async_setup_services(hass)
     return True
@@ -5,7 +5,7 @@ from datetime import timedelta
 from homeassistant.helpers import config_validation as cv
 from homeassistant.components.binary_sensor import ENTITY_ID_FORMAT, BinarySensorEntity, PLATFORM_SCHEMA
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
@@ -50,9 +50,6 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
 async def _setup_entities(
     hass: HomeAssistant, device: NipcaDevice, config: ConfigEntry, async_add_entities: Callable
 ):
-    await device.update_info()
-    device.create_listener_task(hass)
-
     coordinator = DataUpdateCoordinator(
         hass,
         _LOGGER,
@@ -63,10 +60,26 @@ async def _setup_entities(
     device._coordinator = coordinator
     await coordinator.async_refresh()
 
-    async_add_entities(
-        NipcaMotionSensor(hass, device, coordinator, sensor_name, sensor_class)
-        for sensor_class, sensor_name in get_sensors(device._attributes)
-    )
+    added = set()
+
+    @callback
+    def async_add_new_sensors():
+        """Add the sensors found since the last call, once the camera is known."""
+        if not device._probed and not device._attributes:
+            return
+        coordinator.async_update_listeners()
+        new_sensors = [
+            sensor for key, sensor in device.model.sensors.items() if key not in added
+        ]
+        added.update(sensor.key for sensor in new_sensors)
+        if new_sensors:
+            async_add_entities(
+                NipcaMotionSensor(hass, device, coordinator, sensor.key, sensor.device_class)
+                for sensor in new_sensors
+            )
+
+    async_add_new_sensors()
+    return device.async_add_listener(async_add_new_sensors)
 
 
 async def async_setup_entry(
@@ -75,11 +88,10 @@ async def async_setup_entry(
     async_add_entities: Callable,
 ) -> None:
     """Setup sensors from a config entry created in the integrations UI."""
-    config = hass.data[NIPCA_DOMAIN][config_entry.entry_id]
-    if config_entry.options:
-        config.update(config_entry.options)
-    device = NipcaDevice(hass, config)
-    await _setup_entities(hass, device, config, async_add_entities)
+    device = hass.data[NIPCA_DOMAIN][config_entry.entry_id]
+    config_entry.async_on_unload(
+        await _setup_entities(hass, device, device.config, async_add_entities)
+    )
 
 
 async def async_setup_platform(
@@ -92,31 +104,9 @@ async def async_setup_platform(
     device = NipcaDevice(hass, config)
     device.url = config.get(CONF_URL, "")
     await _setup_entities(hass, device, config, async_add_entities)
-
-
-def get_sensors(attributes: dict) -> list:
-    sensors = [("motion", "md1")]
-    if attributes.get("mic") == "yes":
-        sensors.append(("sound", "audio_detected"))
-
-    if attributes.get("pir") == "yes":
-        sensors.append(("sound", "pir"))
-
-    if attributes.get("led") == "yes":
-        sensors.append(("light", "led"))
-
-    if attributes.get("ir") == "yes":
-        sensors.append(("light", "irled"))
-
-    num_inputs = int(attributes.get("inputs", 0))
-    for input in range(1, num_inputs + 1):
-        sensors.append((None, f"input{input}"))
-
-    num_outputs = int(attributes.get("outputs", 0))
-    for output in range(1, num_outputs + 1):
-        sensors.append((None, f"output{output}"))
-
-    return sensors
+    hass.async_create_background_task(
+        device.async_probe(), f"{device.get_task_name()}_probe"
+    )
 
 
 class NipcaMotionSensor(CoordinatorEntity, BinarySensorEntity):
@@ -136,21 +126,32 @@ class NipcaMotionSensor(CoordinatorEntity, BinarySensorEntity):
             hass=hass,
         )
 
+    @property
+    def available(self) -> bool:
+        return self._device.available and super().available
+
+    async def async_added_to_hass(self) -> None:
+        """Open the notify stream while at least one sensor is enabled."""
+        await super().async_added_to_hass()
+        self._device.acquire_listener()
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        self._device.release_listener()
+
     @property
     def unique_id(self):
         """Return a unique_id for this entity."""
-        return "_".join(
-            [
-                self._device._attributes.get("macaddr", "").replace(".", "_"),
-                self._name,
-                "sensor",
-            ]
-        )
+        if sensor := self._device.model.sensors.get(self._name):
+            return sensor.unique_id
+        return f"_{self._name}_sensor"
 
     @property
     def name(self):
         """Return the name of the sensor."""
-        return " ".join([self._device._attributes.get("name", ""), self._name, "sensor"])
+        if sensor := self._device.model.sensors.get(self._name):
+            return sensor.name
+        return f" {self._name} sensor"
 
     @property
     def is_on(self):
@@ -1,17 +1,61 @@
+import logging
+import voluptuous as vol
+
+from aiohttp import web
+from anyio import ClosedResourceError
+from contextlib import aclosing
+from datetime import timedelta
+from httpx import HTTPError
+
 from homeassistant import config_entries, core
+from homeassistant.components.camera import PLATFORM_SCHEMA, CameraEntityFeature
 from homeassistant.components.mjpeg.camera import MjpegCamera
 from homeassistant.const import (
     CONF_AUTHENTICATION,
+    CONF_ENTITIES,
+    CONF_FILENAME,
     CONF_NAME,
     CONF_PASSWORD,
     CONF_USERNAME,
     CONF_VERIFY_SSL,
 )
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity import DeviceInfo
 
-from .const import NIPCA_DOMAIN
+from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+
+from .const import (
+    ATTR_DURATION,
+    CONF_COLUMNS,
+    CONF_INTERVAL,
+    CONF_TILE_HEIGHT,
+    CONF_TILE_WIDTH,
+    MJPEG_MAX_FPS,
+    MJPEG_MAX_WIDTH,
+    MOSAIC_DEFAULT_NAME,
+    NIPCA_DOMAIN,
+    SERVICE_EXPORT_CLIP,
+)
+from .mosaic import NipcaMosaicCamera
 from .nipca import NipcaDevice
 
+_LOGGER = logging.getLogger(__name__)
+
+MJPEG_BOUNDARY = "nipcaframe"
+
+PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
+    {
+        vol.Required(CONF_ENTITIES): cv.entity_ids,
+        vol.Optional(CONF_NAME, default=MOSAIC_DEFAULT_NAME): cv.string,
+        vol.Optional(CONF_COLUMNS, default=3): cv.positive_int,
+        vol.Optional(CONF_TILE_WIDTH, default=320): cv.positive_int,
+        vol.Optional(CONF_TILE_HEIGHT, default=180): cv.positive_int,
+        vol.Optional(CONF_INTERVAL, default=timedelta(seconds=5)): cv.time_period,
+    }
+)
+
 
 async def async_setup_entry(
     hass: core.HomeAssistant,
@@ -19,16 +63,25 @@ async def async_setup_entry(
     async_add_entities,
 ):
     """Setup sensors from a config entry created in the integrations UI."""
-    config = hass.data[NIPCA_DOMAIN][config_entry.entry_id]
-    if config_entry.options:
-        config.update(config_entry.options)
+    device = hass.data[NIPCA_DOMAIN][config_entry.entry_id]
+    config = device.config
 
-    device = NipcaDevice(hass, config)
-    await device.update_info()
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_EXPORT_CLIP,
+        {
+            vol.Required(CONF_FILENAME): cv.string,
+            vol.Optional(ATTR_DURATION, default=5): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=60)
+            ),
+        },
+        "async_export_clip",
+    )
 
     async_add_entities(
         [
-            MjpegCamera(
+            NipcaCamera(
+                device,
                 name=config_entry.title,
                 authentication=config[CONF_AUTHENTICATION],
                 username=config[CONF_USERNAME],
@@ -44,3 +97,107 @@ async def async_setup_entry(
             )
         ]
     )
+
+
+async def async_setup_platform(
+    hass: core.HomeAssistant,
+    config: ConfigType,
+    async_add_entities,
+    discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    """Set up a mosaic of camera stills from yaml configuration."""
+    async_add_entities(
+        [
+            NipcaMosaicCamera(
+                name=config[CONF_NAME],
+                entity_ids=config[CONF_ENTITIES],
+                columns=config[CONF_COLUMNS],
+                tile_size=(config[CONF_TILE_WIDTH], config[CONF_TILE_HEIGHT]),
+                interval=config[CONF_INTERVAL],
+            )
+        ]
+    )
+
+
+def get_query_number(request: web.Request, key: str, maximum: int) -> int | None:
+    """Return a positive integer query parameter clamped to maximum."""
+    try:
+        value = int(request.query.get(key, 0))
+    except ValueError:
+        return None
+    return min(value, maximum) if value > 0 else None
+
+
+class NipcaCamera(MjpegCamera):
+    """MJPEG camera serving still images from the device snapshot cache."""
+
+    def __init__(self, device: NipcaDevice, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._device = device
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._device.async_add_listener(self._device_updated))
+
+    @property
+    def available(self) -> bool:
+        return self._device.available
+
+    @callback
+    def _device_updated(self) -> None:
+        """Follow the camera to its probed or new URL."""
+        self._mjpeg_url = self._device.mjpeg_url
+        self._still_image_url = self._device.still_image_url
+        self.async_write_ha_state()
+
+    @property
+    def supported_features(self) -> CameraEntityFeature:
+        """Offer the H.264 stream when the camera has one, MJPEG otherwise."""
+        if self._device.rtsp_url:
+            return CameraEntityFeature.STREAM
+        return CameraEntityFeature(0)
+
+    async def stream_source(self) -> str | None:
+        return self._device.rtsp_url
+
+    async def async_camera_image(
+        self, width: int | None = None, height: int | None = None
+    ) -> bytes | None:
+        """Return a still image scaled to fit width x height when given."""
+        return await self._device.async_camera_image(width, height)
+
+    async def handle_async_mjpeg_stream(
+        self, request: web.Request
+    ) -> web.StreamResponse | None:
+        """Serve the stream at the fps and width asked by the viewer, if any."""
+        fps = get_query_number(request, "fps", MJPEG_MAX_FPS)
+        width = get_query_number(request, "width", MJPEG_MAX_WIDTH)
+        if not fps and not width:
+            return await super().handle_async_mjpeg_stream(request)
+
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": f"multipart/x-mixed-replace;boundary={MJPEG_BOUNDARY}"
+            }
+        )
+        await response.prepare(request)
+        try:
+            async with aclosing(
+                self._device.async_mjpeg_frames(width, fps)
+            ) as frames:
+                async for frame in frames:
+                    await response.write(
+                        b"--%s\r\nContent-Type: image/jpeg\r\n"
+                        b"Content-Length: %d\r\n\r\n%s\r\n"
+                        % (MJPEG_BOUNDARY.encode(), len(frame), frame)
+                    )
+        except (ConnectionError, HTTPError, ClosedResourceError) as error:
+            # ConnectionResetError included, the viewer went away
+            _LOGGER.debug("NIPCA mjpeg stream closed: %s", error)
+        return response
+
+    async def async_export_clip(self, filename: str, duration: float) -> None:
+        """Save buffered pre-event frames and the following seconds to a file."""
+        if not self.hass.config.is_allowed_path(filename):
+            raise HomeAssistantError(f"Cannot write `{filename}`, no access to path")
+        await self._device.async_export_clip(filename, duration)
@@ -9,6 +9,7 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_PASSWORD,
     CONF_SCAN_INTERVAL,
+    CONF_TIMEOUT,
     CONF_URL,
     CONF_USERNAME,
     CONF_VERIFY_SSL,
@@ -19,8 +20,21 @@ from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 from typing import Any, Dict, Optional
 
-from .const import NIPCA_DEFAULT_NAME, NIPCA_DOMAIN, NIPCA_SCAN_INTERVAL, STEP_CONFIG, STILL_IMAGE
-from .nipca import DLinkUPNPProfile, NipcaDevice
+from .const import (
+    ASYNC_TIMEOUT,
+    CONF_BUFFER_SECONDS,
+    CONF_EVENT_KEYS,
+    CONF_MOTION_MASK,
+    CONF_MOTION_SENSITIVITY,
+    CONF_SOFTWARE_MOTION,
+    MOTION_DEFAULT_SENSITIVITY,
+    NIPCA_DEFAULT_NAME,
+    NIPCA_DOMAIN,
+    NIPCA_SCAN_INTERVAL,
+    STEP_CONFIG,
+    STILL_IMAGE,
+)
+from .nipca import NipcaDevice
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -44,6 +58,46 @@ def get_config_schema(scan_interval):
     )
 
 
+def get_options_schema(options: dict, scan_interval):
+    return vol.Schema(
+        {
+            vol.Optional(CONF_SCAN_INTERVAL, default=scan_interval): cv.positive_int,
+            vol.Optional(
+                CONF_TIMEOUT,
+                description={
+                    "suggested_value": options.get(CONF_TIMEOUT, ASYNC_TIMEOUT)
+                },
+            ): cv.positive_int,
+            vol.Optional(
+                CONF_BUFFER_SECONDS,
+                description={"suggested_value": options.get(CONF_BUFFER_SECONDS, 0)},
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=60)),
+            vol.Optional(
+                CONF_SOFTWARE_MOTION,
+                description={
+                    "suggested_value": options.get(CONF_SOFTWARE_MOTION, False)
+                },
+            ): cv.boolean,
+            vol.Optional(
+                CONF_MOTION_SENSITIVITY,
+                description={
+                    "suggested_value": options.get(
+                        CONF_MOTION_SENSITIVITY, MOTION_DEFAULT_SENSITIVITY
+                    )
+                },
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+            vol.Optional(
+                CONF_MOTION_MASK,
+                description={"suggested_value": options.get(CONF_MOTION_MASK, "")},
+            ): vol.Match(r"^[01]{0,25}$"),
+            vol.Optional(
+                CONF_EVENT_KEYS,
+                description={"suggested_value": options.get(CONF_EVENT_KEYS, "")},
+            ): cv.string,
+        }
+    )
+
+
 def get_discovery_schema(resps):
     return vol.Schema(
         {
@@ -61,6 +115,8 @@ async def is_valid_auth(auth_data: dict, data: dict, hass: core.HassJob):
     except Exception as e:
         _LOGGER.error(e)
         return False
+    finally:
+        await device.async_stop()
     return True
 
 
@@ -76,6 +132,8 @@ class NipcaConfigFlow(config_entries.ConfigFlow, domain=NIPCA_DOMAIN):
             self.data = user_input
             return await self.async_step_auth()
 
+        from .discovery import DLinkUPNPProfile
+
         resps = await DLinkUPNPProfile.async_discover()
         return self.async_show_form(
             step_id="user", data_schema=get_discovery_schema(resps)
@@ -128,9 +186,10 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
-        config_schema = get_config_schema(
+        config_schema = get_options_schema(
+            self.config_entry.options,
             self.config_entry.options.get(
                 CONF_SCAN_INTERVAL, self.config_entry.data[CONF_SCAN_INTERVAL]
-            )
+            ),
         )
         return self.async_show_form(step_id="init", data_schema=config_schema)
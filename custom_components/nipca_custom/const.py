@@ -1,10 +1,49 @@
+from datetime import timedelta
+
+from homeassistant.const import (
+    CONF_AUTHENTICATION,
+    CONF_PASSWORD,
+    CONF_URL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+)
+
 NIPCA_DOMAIN = "nipca_custom"
 NIPCA_DEFAULT_NAME = "NIPCA Custom"
 NIPCA_SCAN_INTERVAL = 10
 ASYNC_TIMEOUT = 10
+# Seconds between probes of a camera that did not answer at setup
+PROBE_RETRY = 30
+# Consecutive connection failures after which a camera is treated as offline
+OFFLINE_FAILURES = 3
+OFFLINE_PROBE_INTERVAL = 15
+# HTTPS cameras keep their connections open to avoid new TLS handshakes
+TLS_KEEPALIVE_EXPIRY = 300
+TLS_KEEPALIVE_CONNECTIONS = 4
+DESCRIPTION_MAX_SIZE = 64 * 1024
+CGI_MAX_SIZE = 32 * 1024
+
+ATTRIBUTE_KEYS = frozenset(
+    {
+        "name",
+        "macaddr",
+        "mic",
+        "pir",
+        "led",
+        "ir",
+        "inputs",
+        "outputs",
+        "enable",
+        "motiondetectionenable",
+        "vprofilenum",
+    }
+)
+ATTRIBUTE_PREFIXES = ("vprofile",)
 
 DATA_NIPCA = "nipca.{}"
 
+UPNP_DEVICE_TYPE = "urn:schemas-upnp-org:device:Basic:1"
+
 COMMON_INFO = "{}/common/info.cgi"
 STREAM_INFO = "{}/config/stream_info.cgi"
 MOTION_INFO = [
@@ -12,6 +51,78 @@ MOTION_INFO = [
     "{}/motion.cgi",  # Some D-Links has only this one working
 ]
 STILL_IMAGE = "{}/image/jpeg.cgi"
+# Seconds a fetched still image is served from cache
+SNAPSHOT_MAX_AGE = 5
+# Resized still images kept per camera, least recently used dropped first
+SNAPSHOT_VARIANTS = 8
+
+# Pre-event MJPEG frame buffer, disabled when buffer_seconds is 0
+CONF_BUFFER_SECONDS = "buffer_seconds"
+FRAME_BUFFER_MAX_BYTES = 16 * 1024 * 1024
+FRAME_BUFFER_RETRY = 10
 NOTIFY_STREAM = "{}/config/notify_stream.cgi"
+RTSP_URL = "rtsp://{}/live{}.sdp"
+RTSP_PORT = 554
+RTSP_CODEC = "H.264"
+MJPEG_CODEC = "MJPEG"
+# Upper bound of the fps requested by a live view
+MJPEG_MAX_FPS = 30
+MJPEG_MAX_WIDTH = 4096
+NOTIFY_INFO = "{}/config/notify.cgi"
+# Seconds to collect a burst of notify events into one state update
+NOTIFY_BATCH_WINDOW = 0.1
+
+# Polling fallback used while the notify stream keeps failing
+NOTIFY_STREAM_RETRIES = 3
+NOTIFY_POLL_MIN = 1
+NOTIFY_POLL_MAX = 30
+NOTIFY_POLL_DURATION = 300
+
+# Notify keys whose rising edge prefetches a still image
+MOTION_KEYS = ("md1", "pir")
+
+# Software motion detection, batched over all cameras that enable it
+CONF_SOFTWARE_MOTION = "software_motion"
+CONF_MOTION_SENSITIVITY = "motion_sensitivity"
+CONF_MOTION_MASK = "motion_mask"
+DATA_MOTION_ANALYZER = f"{NIPCA_DOMAIN}_motion_analyzer"
+SOFTWARE_MOTION_KEY = "md1"
+MOTION_DEFAULT_SENSITIVITY = 50
+MOTION_ANALYSIS_INTERVAL = timedelta(seconds=2)
+MOTION_FRAME_SIZE = (80, 60)
+MOTION_MASK_BLOCKS = 5
+MOTION_PIXEL_THRESHOLD = 25
+
+# Mosaic camera set up from yaml
+MOSAIC_DEFAULT_NAME = "NIPCA Mosaic"
+CONF_COLUMNS = "columns"
+CONF_TILE_WIDTH = "tile_width"
+CONF_TILE_HEIGHT = "tile_height"
+CONF_INTERVAL = "interval"
+
+SERVICE_EXPORT_CLIP = "export_clip"
+ATTR_DURATION = "duration"
+
+# Notify keys fired as nipca_event bus events on change
+CONF_EVENT_KEYS = "event_keys"
+NIPCA_EVENT = "nipca_event"
+
+SERVICE_SET_PARAMETERS = "set_parameters"
+ATTR_CGI = "cgi"
+ATTR_PARAMETERS = "parameters"
+# Cameras configured at the same time by set_parameters
+FLEET_WORKERS = 8
+
+# Entry data key holding the last known device attributes
+CONF_ATTRIBUTES = "attributes"
 
 STEP_CONFIG = "config"
+
+# Options that need a new connection to the camera when changed
+CONNECTION_OPTIONS = (
+    CONF_URL,
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_AUTHENTICATION,
+    CONF_VERIFY_SSL,
+)
@@ -0,0 +1,32 @@
+"""Diagnostics support for NIPCA."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_URL, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_ATTRIBUTES, NIPCA_DOMAIN
+
+TO_REDACT = {CONF_PASSWORD, CONF_URL, CONF_USERNAME, "macaddr"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return diagnostics for a config entry."""
+    device = hass.data[NIPCA_DOMAIN][entry.entry_id]
+    return {
+        "entry": {
+            "data": async_redact_data(
+                {k: v for k, v in entry.data.items() if k != CONF_ATTRIBUTES}, TO_REDACT
+            ),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "attributes": async_redact_data(device._attributes, TO_REDACT),
+        "device": {
+            "available": device.available,
+            "https": device.https,
+            "stream_unavailable": device.stream_unavailable,
+            "listener_users": device._listener_users,
+        },
+        "connections": device.connection_stats,
+    }
@@ -0,0 +1,10 @@
+"""UPnP discovery helpers, only needed by the config flow."""
+from async_upnp_client.profiles.profile import UpnpProfileDevice
+
+from .const import UPNP_DEVICE_TYPE
+
+
+class DLinkUPNPProfile(UpnpProfileDevice):
+    DEVICE_TYPES = [
+        UPNP_DEVICE_TYPE,
+    ]
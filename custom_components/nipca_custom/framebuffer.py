@@ -0,0 +1,77 @@
+"""Pre-event MJPEG frame buffer of a NIPCA camera."""
+from collections import deque
+import os
+from time import monotonic
+
+JPEG_START = b"\xff\xd8"
+JPEG_END = b"\xff\xd9"
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+class MjpegFrameParser:
+    """Split a multipart MJPEG byte stream into JPEG frames."""
+
+    def __init__(self, max_frame_size: int) -> None:
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list:
+        """Add received bytes, return the frames completed by them."""
+        buffer = self._buffer
+        buffer += chunk
+        frames = []
+        while True:
+            start = buffer.find(JPEG_START)
+            if start < 0:
+                # Keep a trailing 0xff that may begin the next marker
+                del buffer[:-1]
+                break
+            end = buffer.find(JPEG_END, start + 2)
+            if end < 0:
+                del buffer[:start]
+                if len(buffer) > self.max_frame_size:
+                    buffer.clear()
+                break
+            frames.append(bytes(buffer[start : end + 2]))
+            del buffer[: end + 2]
+        return frames
+
+
+class FrameBuffer:
+    """Keep the last frames of a stream, bounded by duration and size."""
+
+    def __init__(self, seconds: float, max_bytes: int) -> None:
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._frames = deque()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def append(self, frame: bytes, timestamp: float | None = None):
+        if timestamp is None:
+            timestamp = monotonic()
+        self._frames.append((timestamp, frame))
+        self.size += len(frame)
+
+        frames = self._frames
+        while frames and (
+            self.size > self.max_bytes or frames[0][0] < timestamp - self.seconds
+        ):
+            self.size -= len(frames.popleft()[1])
+
+    def frames(self, since: float | None = None) -> list:
+        """Return buffered frames newer than since."""
+        return [
+            frame for timestamp, frame in self._frames if since is None or timestamp > since
+        ]
+
+
+def write_clip(path: str, frames: list):
+    """Write frames as a single MJPEG file, to be run in an executor."""
+    if directory := os.path.dirname(path):
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as clip:
+        for frame in frames:
+            clip.write(frame)
@@ -0,0 +1,111 @@
+"""Typed NIPCA device model built from the camera attributes."""
+from dataclasses import dataclass, field
+
+from .const import MJPEG_CODEC, RTSP_CODEC
+
+
+def get_sensors(attributes: dict) -> list:
+    sensors = [("motion", "md1")]
+    if attributes.get("mic") == "yes":
+        sensors.append(("sound", "audio_detected"))
+
+    if attributes.get("pir") == "yes":
+        sensors.append(("sound", "pir"))
+
+    if attributes.get("led") == "yes":
+        sensors.append(("light", "led"))
+
+    if attributes.get("ir") == "yes":
+        sensors.append(("light", "irled"))
+
+    num_inputs = int(attributes.get("inputs", 0))
+    for input in range(1, num_inputs + 1):
+        sensors.append((None, f"input{input}"))
+
+    num_outputs = int(attributes.get("outputs", 0))
+    for output in range(1, num_outputs + 1):
+        sensors.append((None, f"output{output}"))
+
+    return sensors
+
+
+def parse_resolution(value: str | None) -> tuple[int, int]:
+    """Return the (width, height) of a WxH string, (0, 0) if malformed."""
+    width, _, height = (value or "").lower().partition("x")
+    if width.isdigit() and height.isdigit():
+        return int(width), int(height)
+    return 0, 0
+
+
+@dataclass(frozen=True, slots=True)
+class NipcaSensor:
+    key: str
+    device_class: str | None
+    unique_id: str
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class NipcaModel:
+    """Values derived from the attributes, rebuilt on each attribute refresh."""
+
+    name: str = ""
+    mac: str = ""
+    mjpeg_path: str = ""
+    rtsp_profile: int | None = None
+    # (width, height, path) of the MJPEG profiles, smallest first
+    mjpeg_profiles: tuple[tuple[int, int, str], ...] = ()
+    motion_detection_enabled: bool = False
+    sensors: dict[str, NipcaSensor] = field(default_factory=dict)
+
+    @classmethod
+    def from_attributes(cls, attributes: dict) -> "NipcaModel":
+        name = attributes.get("name", "")
+        mac = attributes.get("macaddr", "")
+        prefix = mac.replace(".", "_")
+
+        num_profiles = int(attributes.get("vprofilenum", 0) or 0)
+        rtsp_profile = next(
+            (
+                profile
+                for profile in range(1, num_profiles + 1)
+                if attributes.get(f"vprofile{profile}") == RTSP_CODEC
+            ),
+            None,
+        )
+
+        mjpeg_profiles = sorted(
+            (*parse_resolution(attributes.get(f"vprofileres{profile}")), path)
+            for profile in range(1, num_profiles + 1)
+            if attributes.get(f"vprofile{profile}") == MJPEG_CODEC
+            and (path := attributes.get(f"vprofileurl{profile}"))
+        )
+
+        return cls(
+            name=name,
+            mac=mac,
+            mjpeg_path=attributes.get("vprofileurl1", ""),
+            rtsp_profile=rtsp_profile,
+            mjpeg_profiles=tuple(mjpeg_profiles),
+            motion_detection_enabled=(
+                attributes.get("enable") == "yes"
+                or attributes.get("motiondetectionenable") == "1"
+            ),
+            sensors={
+                key: NipcaSensor(
+                    key=key,
+                    device_class=device_class,
+                    unique_id=f"{prefix}_{key}_sensor",
+                    name=f"{name} {key} sensor",
+                )
+                for device_class, key in get_sensors(attributes)
+            },
+        )
+
+    def get_mjpeg_path(self, width: int | None = None) -> str:
+        """Return the smallest MJPEG profile at least width wide."""
+        if width:
+            for profile_width, _, path in self.mjpeg_profiles:
+                if profile_width >= width:
+                    return path
+        return self.mjpeg_path
@@ -0,0 +1,100 @@
+"""Camera composing the still images of several cameras into one grid."""
+import asyncio
+import io
+import logging
+import math
+from time import monotonic
+
+from homeassistant.components.camera import Camera, async_get_image
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+MOSAIC_QUALITY = 80
+
+
+def compose_mosaic(images: list, columns: int, tile_size: tuple) -> bytes:
+    """Paste JPEG tiles into a grid image, to be run in an executor."""
+    from PIL import Image
+
+    tile_width, tile_height = tile_size
+    rows = max(math.ceil(len(images) / columns), 1)
+    canvas = Image.new("RGB", (columns * tile_width, rows * tile_height))
+    for index, image in enumerate(images):
+        if image is None:
+            continue
+        row, column = divmod(index, columns)
+        try:
+            with Image.open(io.BytesIO(image)) as tile:
+                tile.draft("RGB", tile_size)
+                tile = tile.convert("RGB")
+                tile.thumbnail(tile_size)
+        except OSError as error:
+            # Left blank like a missing tile, one bad image must not fail the grid
+            _LOGGER.debug("NIPCA mosaic tile %s is not an image: %s", index, error)
+            continue
+        canvas.paste(
+            tile,
+            (
+                column * tile_width + (tile_width - tile.width) // 2,
+                row * tile_height + (tile_height - tile.height) // 2,
+            ),
+        )
+    output = io.BytesIO()
+    canvas.save(output, format="JPEG", quality=MOSAIC_QUALITY)
+    return output.getvalue()
+
+
+class NipcaMosaicCamera(Camera):
+    """Grid of camera stills, rebuilt at most once per interval for all viewers."""
+
+    def __init__(
+        self, name: str, entity_ids: list, columns: int, tile_size: tuple, interval
+    ) -> None:
+        super().__init__()
+        self._attr_name = name
+        self._entity_ids = entity_ids
+        self._columns = columns
+        self._tile_size = tile_size
+        self._interval = interval.total_seconds()
+        self._image = None
+        self._updated = 0.0
+        self._task = None
+
+    async def async_camera_image(
+        self, width: int | None = None, height: int | None = None
+    ) -> bytes | None:
+        """Return the cached mosaic, rebuilding it when it is too old."""
+        if self._image is not None and monotonic() - self._updated < self._interval:
+            return self._image
+        if self._task is None:
+            self._task = self.hass.async_create_task(self._async_rebuild())
+        return await asyncio.shield(self._task)
+
+    async def async_export_clip(self, filename: str, duration: float) -> None:
+        """Reject the export_clip service, the mosaic buffers no frames."""
+        raise HomeAssistantError(f"{self.name} has no frame buffer to export")
+
+    async def _async_get_tile(self, entity_id):
+        width, height = self._tile_size
+        try:
+            image = await async_get_image(
+                self.hass, entity_id, width=width, height=height
+            )
+        except HomeAssistantError as error:
+            _LOGGER.debug("NIPCA mosaic tile error: %s, %s", entity_id, error)
+            return None
+        return image.content
+
+    async def _async_rebuild(self):
+        try:
+            images = await asyncio.gather(
+                *(self._async_get_tile(entity_id) for entity_id in self._entity_ids)
+            )
+            self._image = await self.hass.async_add_executor_job(
+                compose_mosaic, images, self._columns, self._tile_size
+            )
+            self._updated = monotonic()
+        finally:
+            self._task = None
+        return self._image
@@ -0,0 +1,138 @@
+"""Software motion detection for cameras without usable motion events."""
+import asyncio
+import io
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    DATA_MOTION_ANALYZER,
+    MOTION_ANALYSIS_INTERVAL,
+    MOTION_FRAME_SIZE,
+    MOTION_MASK_BLOCKS,
+    MOTION_PIXEL_THRESHOLD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_mask(mask: str | None):
+    """Return the blocks excluded from analysis, row by row.
+
+    The mask uses the layout of MotionDetectionBlockSet: one character per
+    block of a square grid, where 1 marks a block to ignore.
+    """
+    blocks = MOTION_MASK_BLOCKS * MOTION_MASK_BLOCKS
+    mask = (mask or "").ljust(blocks, "0")[:blocks]
+    return tuple(char == "1" for char in mask)
+
+
+def detect_motion(jobs: list) -> list:
+    """Compare frames of many cameras in one batch, to be run in an executor.
+
+    Each job is (image, previous, mask, sensitivity) and the result for it is
+    (frame, detected) where frame is the downscaled grayscale array to pass
+    as previous next time.
+    """
+    import numpy as np
+    from PIL import Image
+
+    width, height = MOTION_FRAME_SIZE
+    results = []
+    for image, previous, mask, sensitivity in jobs:
+        with Image.open(io.BytesIO(image)) as source:
+            source.draft("L", MOTION_FRAME_SIZE)
+            frame = np.asarray(
+                source.convert("L").resize(MOTION_FRAME_SIZE), dtype=np.int16
+            )
+        if previous is None or previous.shape != frame.shape:
+            results.append((frame, False))
+            continue
+
+        changed = np.abs(frame - previous) > MOTION_PIXEL_THRESHOLD
+        if any(mask):
+            blocks = np.array(mask, dtype=bool).reshape(
+                MOTION_MASK_BLOCKS, MOTION_MASK_BLOCKS
+            )
+            ignored = np.kron(
+                blocks,
+                np.ones(
+                    (height // MOTION_MASK_BLOCKS, width // MOTION_MASK_BLOCKS),
+                    dtype=bool,
+                ),
+            )
+            changed = changed[~ignored]
+        ratio = changed.mean() if changed.size else 0.0
+        results.append((frame, ratio * 1000 > 101 - sensitivity))
+    return results
+
+
+class MotionAnalyzer:
+    """Run software motion detection for all enabled cameras in one batch."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._devices = set()
+        self._frames = {}
+        self._unsub = None
+        self._running = False
+
+    def add(self, device):
+        self._devices.add(device)
+        if self._unsub is None:
+            self._unsub = async_track_time_interval(
+                self.hass, self._async_analyze, MOTION_ANALYSIS_INTERVAL
+            )
+
+    def remove(self, device):
+        self._devices.discard(device)
+        self._frames.pop(device, None)
+        if not self._devices and self._unsub:
+            self._unsub()
+            self._unsub = None
+
+    async def _async_analyze(self, now=None):
+        # Skip a tick rather than queue batches when analysis falls behind
+        if self._running:
+            return
+        self._running = True
+        try:
+            devices = list(self._devices)
+            images = await asyncio.gather(
+                *(device.async_motion_frame() for device in devices),
+                return_exceptions=True,
+            )
+            batch = [
+                (device, image)
+                for device, image in zip(devices, images)
+                if isinstance(image, bytes)
+            ]
+            if not batch:
+                return
+            results = await self.hass.async_add_executor_job(
+                detect_motion,
+                [
+                    (
+                        image,
+                        self._frames.get(device),
+                        device.motion_mask,
+                        device.motion_sensitivity,
+                    )
+                    for device, image in batch
+                ],
+            )
+            for (device, _), (frame, detected) in zip(batch, results):
+                if device in self._devices:
+                    self._frames[device] = frame
+                    device.set_software_motion(detected)
+        except Exception as error:
+            _LOGGER.error("NIPCA motion analysis error: %s", error)
+        finally:
+            self._running = False
+
+
+def get_motion_analyzer(hass: HomeAssistant) -> MotionAnalyzer:
+    if (analyzer := hass.data.get(DATA_MOTION_ANALYZER)) is None:
+        analyzer = hass.data[DATA_MOTION_ANALYZER] = MotionAnalyzer(hass)
+    return analyzer
@@ -1,49 +1,135 @@
-import xmltodict
+import asyncio
+import codecs
 import logging
 
 from asyncio import CancelledError
+from contextlib import aclosing, asynccontextmanager, suppress
 from anyio import ClosedResourceError
-from async_upnp_client.profiles.profile import UpnpProfileDevice
 from homeassistant.const import (
     CONF_AUTHENTICATION,
     CONF_NAME,
     CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    CONF_TIMEOUT,
     CONF_URL,
     CONF_USERNAME,
     CONF_VERIFY_SSL,
     EVENT_HOMEASSISTANT_STOP,
+    STATE_OFF,
+    STATE_ON,
     HTTP_BASIC_AUTHENTICATION,
     HTTP_DIGEST_AUTHENTICATION,
 )
 from homeassistant.core import HassJob
-from homeassistant.helpers.httpx_client import get_async_client
-from httpx import BasicAuth, DigestAuth, ReadTimeout, Timeout
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.httpx_client import (
+    SERVER_SOFTWARE,
+    USER_AGENT,
+    get_async_client,
+)
+from homeassistant.util import dt as dt_util
+from homeassistant.util.ssl import client_context, create_no_verify_ssl_context
+from httpx import (
+    AsyncClient,
+    BasicAuth,
+    DigestAuth,
+    HTTPError,
+    Limits,
+    PoolTimeout,
+    ReadTimeout,
+    Timeout,
+    TransportError,
+)
+from time import monotonic
+from urllib.parse import quote, urlencode, urljoin, urlsplit
+from xml.etree.ElementTree import ParseError, XMLPullParser
 
 from .const import (
     ASYNC_TIMEOUT,
+    CONF_BUFFER_SECONDS,
+    CONF_EVENT_KEYS,
+    CONF_MOTION_MASK,
+    CONF_MOTION_SENSITIVITY,
+    CONF_SOFTWARE_MOTION,
+    ATTRIBUTE_KEYS,
+    ATTRIBUTE_PREFIXES,
+    CGI_MAX_SIZE,
     COMMON_INFO,
+    DESCRIPTION_MAX_SIZE,
+    FRAME_BUFFER_MAX_BYTES,
+    FRAME_BUFFER_RETRY,
+    MOTION_ANALYSIS_INTERVAL,
+    MOTION_DEFAULT_SENSITIVITY,
+    MOTION_FRAME_SIZE,
     MOTION_INFO,
+    MOTION_KEYS,
+    NIPCA_DOMAIN,
+    NIPCA_EVENT,
+    NOTIFY_BATCH_WINDOW,
+    NOTIFY_INFO,
+    NOTIFY_POLL_DURATION,
+    NOTIFY_POLL_MAX,
+    NOTIFY_POLL_MIN,
     NOTIFY_STREAM,
+    NOTIFY_STREAM_RETRIES,
+    OFFLINE_FAILURES,
+    OFFLINE_PROBE_INTERVAL,
+    PROBE_RETRY,
+    RTSP_PORT,
+    RTSP_URL,
+    SNAPSHOT_MAX_AGE,
+    SNAPSHOT_VARIANTS,
+    SOFTWARE_MOTION_KEY,
     STILL_IMAGE,
     STREAM_INFO,
+    TLS_KEEPALIVE_EXPIRY,
+    TLS_KEEPALIVE_CONNECTIONS,
 )
+from .framebuffer import FrameBuffer, MjpegFrameParser, write_clip
+from .model import NipcaModel
+from .motion import get_motion_analyzer, parse_mask
+from .snapshot import SnapshotCache, resize_image
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class DLinkUPNPProfile(UpnpProfileDevice):
-    DEVICE_TYPES = [
-        "urn:schemas-upnp-org:device:Basic:1",
-    ]
+def normalize_mac(mac):
+    return "".join(char for char in (mac or "").lower() if char.isalnum())
+
+
+def is_attribute_key(key):
+    """Return True for the device attributes used by the integration."""
+    return key in ATTRIBUTE_KEYS or key.startswith(ATTRIBUTE_PREFIXES)
+
+
+def parse_event_keys(value):
+    """Return the notify keys listed in a comma separated option."""
+    return frozenset(
+        key.strip().lower() for key in (value or "").split(",") if key.strip()
+    )
 
 
 class NipcaDevice:
-    def __init__(self, hass: HassJob, config: dict) -> None:
+    def __init__(self, hass: HassJob, config: dict, entry_id=None) -> None:
+        # HTTPS cameras get their own client once their URL is known
+        self.https = False
         self.client = get_async_client(
             hass, verify_ssl=config.get(CONF_VERIFY_SSL, False)
         )
+        self.connection_stats = {
+            "requests": 0,
+            "connections": 0,
+            "tls_handshakes": 0,
+            "tls_resumed": 0,
+        }
         self.hass = hass
         self.config = config
+        self.timeout = config.get(CONF_TIMEOUT, ASYNC_TIMEOUT)
+        self.entry_id = entry_id
+        self.event_keys = parse_event_keys(config.get(CONF_EVENT_KEYS))
+        self.software_motion = bool(config.get(CONF_SOFTWARE_MOTION))
 
         username = config.get(CONF_USERNAME)
         password = config.get(CONF_PASSWORD)
@@ -56,111 +142,752 @@ class NipcaDevice:
         else:
             self.auth = None
 
-        self.url = ""
+        self._url = ""
+        self.udn = None
+        self._device_id = None
+        self.online = True
+        self._probed = False
+        self._failures = 0
+        self._unsub_online_probe = None
+        self._update_callbacks = []
         self._listener = None
+        self._listener_users = 0
+        self._update_handle = None
         self._coordinator = None
         self._events = {}
         self._attributes = {}
-
-        hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, self.handle_stop_event)
+        self.model = NipcaModel()
+        self._stream_failures = 0
+        self._snapshot_task = None
+        self._buffer_task = None
+        self._motion_task = None
+        self._motion_frame = None
+        self.snapshot = SnapshotCache(SNAPSHOT_VARIANTS)
+        self.frame_buffer = None
+        self._unsub_stop = None
+        self._closed = False
 
     def handle_stop_event(self, *args, **kwargs):
+        self._unsub_stop = None
         if self._listener and not self._listener.done():
             self._listener.cancel()
+        for task in (self._buffer_task, self._motion_task):
+            if task:
+                task.cancel()
+
+    def _listen_stop(self, hass: HassJob):
+        if self._unsub_stop is None:
+            self._unsub_stop = hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, self.handle_stop_event
+            )
 
     def create_listener_task(self, hass: HassJob):
-        self._listener = hass.loop.create_task(
-            self._notify_listener(),
-            name=self.get_task_name(),
+        self._listen_stop(hass)
+        if self.stream_unavailable:
+            listener = self._poll_listener()
+        else:
+            listener = self._notify_listener()
+        self._listener = hass.loop.create_task(listener, name=self.get_task_name())
+
+    @property
+    def stream_unavailable(self):
+        """Return True when the notify stream keeps failing."""
+        return self._stream_failures >= NOTIFY_STREAM_RETRIES
+
+    def apply_options(self, config):
+        """Apply options that do not need a new connection."""
+        self.config = config
+        self.timeout = config.get(CONF_TIMEOUT, ASYNC_TIMEOUT)
+        self.event_keys = parse_event_keys(config.get(CONF_EVENT_KEYS))
+        self.software_motion = (
+            bool(config.get(CONF_SOFTWARE_MOTION)) and not self._closed
         )
+        if self._coordinator and config.get(CONF_SCAN_INTERVAL):
+            self._coordinator.update_interval = config[CONF_SCAN_INTERVAL]
+        self.start_background_tasks()
+
+    def start_background_tasks(self):
+        """Start or stop the optional features to match the config."""
+        self.start_frame_buffer()
+        self.start_software_motion()
+
+    @property
+    def motion_mask(self):
+        return parse_mask(self.config.get(CONF_MOTION_MASK))
+
+    @property
+    def motion_sensitivity(self):
+        return self.config.get(CONF_MOTION_SENSITIVITY, MOTION_DEFAULT_SENSITIVITY)
+
+    def start_software_motion(self):
+        analyzer = get_motion_analyzer(self.hass)
+        if self.software_motion:
+            analyzer.add(self)
+            if self._motion_task is None and self.model.mjpeg_profiles:
+                self._listen_stop(self.hass)
+                self._motion_task = self.hass.loop.create_task(
+                    self._motion_reader(), name=f"{self.get_task_name()}_motion"
+                )
+        else:
+            analyzer.remove(self)
+            self._motion_frame = None
+            if self._motion_task:
+                self._motion_task.cancel()
+                self._motion_task = None
+
+    async def _motion_reader(self):
+        """Keep the newest frame of the smallest MJPEG profile for the analyzer.
+
+        One long-lived stream per camera avoids a new connection, and for
+        HTTPS a new TLS handshake, on every analysis tick.
+        """
+        while self.software_motion:
+            try:
+                async with aclosing(
+                    self.async_mjpeg_frames(width=MOTION_FRAME_SIZE[0])
+                ) as frames:
+                    async for frame in frames:
+                        self._motion_frame = frame
+            except (ConnectionError, HTTPError, ClosedResourceError) as error:
+                _LOGGER.debug("NIPCA motion stream error: %s", error)
+            await asyncio.sleep(FRAME_BUFFER_RETRY)
+
+    def set_software_motion(self, detected):
+        state = STATE_ON if detected else STATE_OFF
+        self._apply_events(((SOFTWARE_MOTION_KEY, state),))
+
+    def start_frame_buffer(self):
+        """Start, resize or stop the frame buffer to match the config."""
+        seconds = self.config.get(CONF_BUFFER_SECONDS, 0)
+        if not seconds or self._closed:
+            self.frame_buffer = None
+            if self._buffer_task:
+                self._buffer_task.cancel()
+                self._buffer_task = None
+            return
+        if self.frame_buffer:
+            self.frame_buffer.seconds = seconds
+        else:
+            self.frame_buffer = FrameBuffer(seconds, FRAME_BUFFER_MAX_BYTES)
+        if self._buffer_task is None:
+            self._listen_stop(self.hass)
+            self._buffer_task = self.hass.loop.create_task(
+                self._frame_buffer_reader(), name=f"{self.get_task_name()}_buffer"
+            )
+
+    async def _frame_buffer_reader(self):
+        """Feed the frame buffer from the MJPEG stream, reconnecting on errors."""
+        while self.frame_buffer is not None:
+            parser = MjpegFrameParser(FRAME_BUFFER_MAX_BYTES)
+            try:
+                async with self.open_stream(self.mjpeg_url) as response:
+                    self._check_response(response)
+                    async for chunk in response.aiter_bytes():
+                        if (frame_buffer := self.frame_buffer) is None:
+                            return
+                        for frame in parser.feed(chunk):
+                            frame_buffer.append(frame)
+            except (ConnectionError, HTTPError, ClosedResourceError) as error:
+                _LOGGER.debug("NIPCA frame buffer error: %s", error)
+            await asyncio.sleep(FRAME_BUFFER_RETRY)
+
+    async def async_mjpeg_frames(self, width=None, fps=None):
+        """Yield frames of the best fitting MJPEG profile, at most fps per second."""
+        interval = 1 / fps if fps else 0
+        parser = MjpegFrameParser(FRAME_BUFFER_MAX_BYTES)
+        sent = None
+        async with self.open_stream(
+            self.url + self.model.get_mjpeg_path(width)
+        ) as response:
+            self._check_response(response)
+            async for chunk in response.aiter_bytes():
+                # Only the newest frame matters to a throttled viewer
+                if not (frames := parser.feed(chunk)):
+                    continue
+                now = monotonic()
+                if sent is None or now - sent >= interval:
+                    sent = now
+                    yield frames[-1]
+
+    async def async_motion_frame(self):
+        """Return a small frame for software motion detection."""
+        if not self.model.mjpeg_profiles:
+            return await self.async_camera_image(
+                max_age=MOTION_ANALYSIS_INTERVAL.total_seconds()
+            )
+        # Each frame is analyzed once, None skips the camera until the next one
+        frame, self._motion_frame = self._motion_frame, None
+        return frame
+
+    async def async_export_clip(self, path, duration):
+        """Write buffered frames and the next duration seconds to path."""
+        if self.frame_buffer is None:
+            raise HomeAssistantError("Frame buffer is disabled")
+        start = monotonic()
+        frames = self.frame_buffer.frames()
+        await asyncio.sleep(duration)
+        if self.frame_buffer is not None:
+            frames.extend(self.frame_buffer.frames(since=start))
+        await self.hass.async_add_executor_job(write_clip, path, frames)
+        return len(frames)
+
+    async def async_stop(self):
+        """Cancel background tasks and release the bus handler."""
+        self._closed = True
+        self.software_motion = False
+        if self._unsub_online_probe:
+            self._unsub_online_probe()
+            self._unsub_online_probe = None
+        if self._update_handle:
+            self._update_handle.cancel()
+            self._update_handle = None
+        if self._unsub_stop:
+            self._unsub_stop()
+            self._unsub_stop = None
+        if listener := self._listener:
+            self._listener = None
+            if not listener.done():
+                listener.cancel()
+                with suppress(CancelledError):
+                    await listener
+        buffer_task, motion_task = self._buffer_task, self._motion_task
+        self.start_background_tasks()
+        for task in (buffer_task, motion_task, self._snapshot_task):
+            if task:
+                task.cancel()
+                with suppress(CancelledError):
+                    await task
+        if self.https:
+            await self.client.aclose()
 
     def get_task_name(self):
         return f"nipca_{self.config[CONF_NAME]}_listener"
 
-    async def get_presentation_url(self):
-        response = await self.request(self.config[CONF_URL])
-        device = xmltodict.parse(response.text)
-        device_info = device["root"]["device"]
-        return device_info.get("presentationURL")
+    async def get_presentation_url(self, location=None):
+        """Read presentationURL from the UPnP description without parsing it all."""
+        parser = XMLPullParser(events=("end",))
+        received = 0
+        # A newly announced location is worth a try even while the old one is down
+        async with self.open_stream(
+            location or self.config[CONF_URL], check_online=location is None
+        ) as response:
+            self._check_response(response)
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > DESCRIPTION_MAX_SIZE:
+                    raise ConnectionError("Device description is too large")
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    tag = element.tag.rsplit("}", 1)[-1]
+                    if tag == "UDN":
+                        self.udn = element.text
+                    elif tag == "presentationURL":
+                        return element.text
+        return None
+
+    def matches_discovery(self, upnp: dict):
+        """Return True if an SSDP announcement describes this camera."""
+        if self.udn and upnp.get("UDN") == self.udn:
+            return True
+        mac = normalize_mac(self.model.mac)
+        return bool(mac) and normalize_mac(upnp.get("serialNumber")) == mac
+
+    async def async_update_location(self, location, presentation_url=None):
+        """Follow the camera to a new UPnP location, e.g. after a DHCP change."""
+        if presentation_url:
+            presentation_url = urljoin(location, presentation_url)
+        else:
+            presentation_url = await self.get_presentation_url(location)
+        # Only a resolved location is kept, a failed one is retried next time
+        self.config[CONF_URL] = location
+        self.set_url(presentation_url)
+        self._set_online()
+
+    @property
+    def url(self):
+        return self._url
+
+    @url.setter
+    def url(self, url):
+        self._url = url
+        self._update_client()
+
+    def _update_client(self):
+        """Use a device client keeping TLS connections alive for HTTPS URLs."""
+        https = urlsplit(self._url).scheme == "https"
+        if https == self.https:
+            return
+        if self.https:
+            self.hass.async_create_background_task(
+                self.client.aclose(), f"{self.get_task_name()}_client_close"
+            )
+        self.https = https
+        verify_ssl = self.config.get(CONF_VERIFY_SSL, False)
+        if not https:
+            self.client = get_async_client(self.hass, verify_ssl=verify_ssl)
+            return
+        # The shared client would close idle connections long before the next
+        # snapshot, each new one costing a TLS handshake on the camera CPU.
+        # Only idle connections are capped, long-lived streams must not
+        # starve the snapshot and CGI requests of a connection.
+        self.client = AsyncClient(
+            verify=client_context() if verify_ssl else create_no_verify_ssl_context(),
+            headers={USER_AGENT: SERVER_SOFTWARE},
+            follow_redirects=True,
+            limits=Limits(
+                max_connections=None,
+                max_keepalive_connections=TLS_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=TLS_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    def set_url(self, url):
+        """Switch to a new base URL and reconnect the running streams."""
+        if url == self.url:
+            return
+        self.url = url
+        if listener := self._listener:
+            listener.cancel()
+            self.create_listener_task(self.hass)
+        if buffer_task := self._buffer_task:
+            self._buffer_task = None
+            buffer_task.cancel()
+            self.start_frame_buffer()
+        if motion_task := self._motion_task:
+            self._motion_task = None
+            motion_task.cancel()
+            self.start_software_motion()
+        self._async_update_listeners()
+
+    def async_add_listener(self, update_callback):
+        """Call update_callback when the device URL or info changes."""
+        self._update_callbacks.append(update_callback)
+
+        def remove_listener():
+            self._update_callbacks.remove(update_callback)
+
+        return remove_listener
+
+    def _async_update_listeners(self):
+        for update_callback in list(self._update_callbacks):
+            update_callback()
 
     def get_request_params(self, url):
-        return dict(
-            method="GET", url=url, auth=self.auth, timeout=Timeout(ASYNC_TIMEOUT)
+        params = dict(
+            method="GET", url=url, auth=self.auth, timeout=Timeout(self.timeout)
         )
+        if self.https:
+            self.connection_stats["requests"] += 1
+            params["extensions"] = {"trace": self._trace_connection}
+        return params
 
-    async def request(self, url):
-        response = await self.client.request(**self.get_request_params(url))
+    async def _trace_connection(self, event_name, info):
+        """Count new connections and TLS handshakes of the device client."""
+        if event_name == "connection.connect_tcp.complete":
+            self.connection_stats["connections"] += 1
+        elif event_name == "connection.start_tls.complete":
+            self.connection_stats["tls_handshakes"] += 1
+            ssl_object = info["return_value"].get_extra_info("ssl_object")
+            if ssl_object is not None and ssl_object.session_reused:
+                self.connection_stats["tls_resumed"] += 1
+
+    @staticmethod
+    def _check_response(response):
         if response.status_code != 200:
             raise ConnectionError(response.reason_phrase)
+
+    async def request(self, url):
+        self._check_online()
+        try:
+            response = await self.client.request(**self.get_request_params(url))
+        except PoolTimeout:
+            # Waiting for a free connection says nothing about the camera
+            raise
+        except TransportError:
+            self._record_failure()
+            raise
+        self._record_success()
+        self._check_response(response)
         return response
 
+    @asynccontextmanager
+    async def open_stream(self, url, check_online=True):
+        if check_online:
+            self._check_online()
+        connected = False
+        try:
+            async with self.client.stream(**self.get_request_params(url)) as response:
+                connected = True
+                self._record_success()
+                yield response
+        except PoolTimeout:
+            raise
+        except TransportError:
+            # Only failures to connect count, a stream may time out when idle
+            if not connected:
+                self._record_failure()
+            raise
+
     def stream(self, suffix):
-        return self.client.stream(**self.get_request_params(suffix.format(self.url)))
+        return self.open_stream(suffix.format(self.url))
+
+    @property
+    def available(self):
+        return self._probed and self.online
+
+    def _check_online(self):
+        """Fail fast instead of waiting for timeouts while the camera is down."""
+        if not self.online:
+            raise ConnectionError("NIPCA camera is offline")
+
+    def _record_success(self):
+        self._failures = 0
+
+    def _record_failure(self):
+        self._failures += 1
+        if self._failures < OFFLINE_FAILURES or not self.online or not self._probed:
+            return
+        _LOGGER.warning("NIPCA camera %s is offline", self.config.get(CONF_NAME))
+        self.online = False
+        if listener := self._listener:
+            self._listener = None
+            listener.cancel()
+        self._schedule_online_probe()
+        self._async_update_listeners()
+
+    def _schedule_online_probe(self):
+        if not self._closed:
+            self._unsub_online_probe = async_call_later(
+                self.hass, OFFLINE_PROBE_INTERVAL, self._async_probe_online
+            )
+
+    async def _async_probe_online(self, now=None):
+        """Check an offline camera with a single cheap request."""
+        try:
+            await self.client.request(
+                **self.get_request_params(COMMON_INFO.format(self.url))
+            )
+        except HTTPError as error:
+            _LOGGER.debug("NIPCA camera still offline: %s", error)
+            self._schedule_online_probe()
+            return
+        self._set_online()
+
+    def _set_online(self):
+        if self._unsub_online_probe:
+            self._unsub_online_probe()
+            self._unsub_online_probe = None
+        self._failures = 0
+        if self.online:
+            return
+        _LOGGER.info("NIPCA camera %s is back online", self.config.get(CONF_NAME))
+        self.online = True
+        if self._listener_users and not self._listener and not self._closed:
+            self.create_listener_task(self.hass)
+        self._async_update_listeners()
+
+    def update_attributes(self, attributes):
+        """Merge attribute values and rebuild the device model from them."""
+        self._attributes.update(attributes)
+        self.model = NipcaModel.from_attributes(self._attributes)
 
     @property
     def mjpeg_url(self):
-        return self.url + self._attributes.get("vprofileurl1", "")
+        return self.url + self.model.mjpeg_path
 
     @property
     def still_image_url(self):
         return STILL_IMAGE.format(self.url)
 
+    @property
+    def rtsp_url(self):
+        """Return the RTSP URL of the first H.264 profile, if there is one."""
+        if (profile := self.model.rtsp_profile) is None:
+            return None
+
+        url = urlsplit(self.url)
+        if not url.hostname:
+            return None
+        netloc = f"{url.hostname}:{RTSP_PORT}"
+        username = self.config.get(CONF_USERNAME)
+        password = self.config.get(CONF_PASSWORD)
+        if username and password:
+            netloc = f"{quote(username, safe='')}:{quote(password, safe='')}@{netloc}"
+        return RTSP_URL.format(netloc, profile)
+
     @property
     def motion_detection_enabled(self):
         """Return the camera motion detection status."""
-        if (
-            self._attributes.get("enable") == "yes"
-            or self._attributes.get("motiondetectionenable") == "1"
-        ):
-            return True
-        return False
+        return self.model.motion_detection_enabled or self.software_motion
 
     async def update_info(self):
         if not self.url:
             self.url = await self.get_presentation_url()
 
-        self._attributes.update(await self._get_attributes(COMMON_INFO))
-        self._attributes.update(await self._get_attributes(STREAM_INFO))
+        attributes = await self._get_attributes(COMMON_INFO, keep=is_attribute_key)
+        attributes.update(
+            await self._get_attributes(STREAM_INFO, keep=is_attribute_key)
+        )
         for motion_url in MOTION_INFO:
-            if attrs := await self._get_attributes(motion_url):
-                self._attributes.update(attrs)
+            if attrs := await self._get_attributes(motion_url, keep=is_attribute_key):
+                attributes.update(attrs)
                 break
+        self.update_attributes(attributes)
+        self._probed = True
+
+    async def async_probe(self):
+        """Probe the camera until it answers, then start everything using it."""
+        while not self._closed:
+            try:
+                await self.update_info()
+            except (ConnectionError, HTTPError, ParseError) as error:
+                _LOGGER.debug("NIPCA probe error: %s, retrying", error)
+                await asyncio.sleep(PROBE_RETRY)
+                continue
+
+            if self._listener_users and not self._listener:
+                self.create_listener_task(self.hass)
+            self.start_background_tasks()
+            self._async_update_listeners()
+            return True
+        return False
+
+    async def async_set_parameters(self, cgi, parameters):
+        """Write parameters through a CGI and verify them by reading it back."""
+        suffix = "{}/" + cgi.lstrip("/")
+        await self.request(f"{suffix.format(self.url)}?{urlencode(parameters)}")
+
+        values = await self._get_attributes(suffix)
+        mismatched = {
+            key: values.get(key.lower())
+            for key, value in parameters.items()
+            if values.get(key.lower()) != value
+        }
+        self.update_attributes(
+            (key, value) for key, value in values.items() if is_attribute_key(key)
+        )
+        self._async_update_listeners()
+        return {"success": not mismatched, "mismatched": mismatched}
+
+    async def _get_attributes(self, suffix, keep=None):
+        """Stream a CGI response, retaining only the keys accepted by keep.
 
-    async def _get_attributes(self, suffix):
+        Raw bytes are counted, so a body without newlines is bounded too.
+        """
         url = suffix.format(self.url)
         result = {}
+        received = 0
         try:
-            response = await self.request(url)
+            async with self.stream(suffix) as response:
+                self._check_response(response)
+                decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+                    errors="replace"
+                )
+                pending = ""
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > CGI_MAX_SIZE:
+                        # Keep the complete lines within the bound
+                        chunk = chunk[: CGI_MAX_SIZE - received]
+                        lines = (pending + decoder.decode(chunk)).split("\n")[:-1]
+                        self._store_lines(result, lines, keep)
+                        _LOGGER.warning("NIPCA response truncated: %s", url)
+                        break
+                    *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+                    self._store_lines(result, lines, keep)
+                else:
+                    self._store_lines(
+                        result, (pending + decoder.decode(b"", True),), keep
+                    )
         except ConnectionError as err:
             _LOGGER.debug("NIPCA ConnectionError: %s, %s", err, url)
-        else:
-            for l in response.iter_lines():
-                result.update(self._parse_line(l))
         return result
 
+    def _store_lines(self, result, lines, keep):
+        for line in lines:
+            if item := self._parse_line(line):
+                if keep is None or keep(item[0]):
+                    result[item[0]] = item[1]
+
     @staticmethod
     def _parse_line(l):
         if l and "=" in l:
             k, v = l.strip().split("=", 1)
-            return {k.lower(): v}
-        return {}
+            return k.lower(), v
+        return None
+
+    def acquire_listener(self):
+        """Start the notify listener for the first enabled entity using it."""
+        self._listener_users += 1
+        if self._listener_users == 1 and self.available and not self._closed:
+            if not self._listener or self._listener.done():
+                self.create_listener_task(self.hass)
+
+    def release_listener(self):
+        """Stop the notify listener once no entity uses it."""
+        self._listener_users -= 1
+        if self._listener_users == 0 and (listener := self._listener):
+            self._listener = None
+            listener.cancel()
 
     async def update_motion_sensors(self):
+        if self._closed or not self._listener_users or not self.available:
+            return self._events
         if not self._listener or (
             self._listener.done() and not self._listener.cancelled()
         ):
             self.create_listener_task(self.hass)
         return self._events
 
+    def _parse_lines(self, lines):
+        items = []
+        for line in lines:
+            line = line.strip()
+            _LOGGER.debug("NIPCA received: %s", line)
+            if item := self._parse_line(line):
+                items.append(item)
+        return items
+
+    def _apply_events(self, items):
+        """Store received event values, return True if any of them changed."""
+        changed = False
+        for key, value in items:
+            if self._events.get(key) != value:
+                if key in MOTION_KEYS and value == "on":
+                    self._fetch_snapshot()
+                if key in self.event_keys:
+                    self._fire_event(key, self._events.get(key), value)
+                self._events[key] = value
+                changed = True
+        if changed:
+            self._schedule_update()
+        return changed
+
+    @property
+    def device_id(self):
+        """Return the device registry id of the config entry device."""
+        if self._device_id is None and self.entry_id:
+            registry = dr.async_get(self.hass)
+            if device := registry.async_get_device(
+                identifiers={(NIPCA_DOMAIN, self.entry_id)}
+            ):
+                self._device_id = device.id
+        return self._device_id
+
+    def _fire_event(self, key, old, new):
+        self.hass.bus.async_fire(
+            NIPCA_EVENT,
+            {
+                "device_id": self.device_id,
+                "key": key,
+                "old": old,
+                "new": new,
+                "timestamp": dt_util.utcnow().isoformat(),
+            },
+        )
+
+    def _schedule_update(self):
+        """Push changed events to the entities once per batch window."""
+        if self._update_handle is None and self._coordinator and not self._closed:
+            self._update_handle = self.hass.loop.call_later(
+                NOTIFY_BATCH_WINDOW, self._push_update
+            )
+
+    def _push_update(self):
+        self._update_handle = None
+        if self._coordinator:
+            self._coordinator.async_set_updated_data(self._events)
+
+    def _fetch_snapshot(self):
+        """Start fetching a still image unless a fetch is already running."""
+        if self._snapshot_task is None and not self._closed:
+            self._snapshot_task = self.hass.loop.create_task(
+                self._update_snapshot(), name=f"{self.get_task_name()}_snapshot"
+            )
+        return self._snapshot_task
+
+    async def _update_snapshot(self):
+        try:
+            response = await self.request(self.still_image_url)
+        except (ConnectionError, HTTPError) as error:
+            _LOGGER.debug("NIPCA snapshot error: %s", error)
+        else:
+            self.snapshot.set(response.content)
+        finally:
+            self._snapshot_task = None
+        return self.snapshot.get()
+
+    async def async_camera_image(
+        self, width=None, height=None, max_age=SNAPSHOT_MAX_AGE
+    ):
+        """Return a recent still image, sharing one fetch between callers."""
+        if (image := self.snapshot.get(max_age)) is None:
+            if task := self._fetch_snapshot():
+                image = await asyncio.shield(task)
+            else:
+                image = self.snapshot.get()
+        if image is None or not (width or height):
+            return image
+
+        size = (width, height)
+        if (resized := self.snapshot.get_variant(size)) is None:
+            resized = await self.hass.async_add_executor_job(
+                resize_image, image, width, height
+            )
+            self.snapshot.set_variant(image, size, resized)
+        return resized
+
+    def _receive_events(self, items):
+        """Apply events from the camera, unless software motion replaces them."""
+        if self.software_motion:
+            items = [item for item in items if item[0] != SOFTWARE_MOTION_KEY]
+        return self._apply_events(items)
+
+    async def _poll_listener(self):
+        """Poll the notify CGI while the stream is unavailable.
+
+        The interval drops to the minimum after a change and doubles while the
+        camera is idle. After a while the task ends so the stream is retried.
+        """
+        _LOGGER.info("NIPCA notify stream unavailable, polling")
+        interval = NOTIFY_POLL_MIN
+        deadline = monotonic() + NOTIFY_POLL_DURATION
+        while monotonic() < deadline:
+            try:
+                events = await self._get_attributes(NOTIFY_INFO)
+            except HTTPError as error:
+                _LOGGER.debug("NIPCA poll error: %s", error)
+                events = {}
+            if self._receive_events(events.items()):
+                interval = NOTIFY_POLL_MIN
+            else:
+                interval = min(interval * 2, NOTIFY_POLL_MAX)
+            await asyncio.sleep(interval)
+
+        self._stream_failures = NOTIFY_STREAM_RETRIES - 1
+        return True
+
     async def _notify_listener(self):
+        received = False
         try:
             async with self.stream(NOTIFY_STREAM) as response:
-                async for line in response.aiter_lines():
-                    line = line.strip()
-                    _LOGGER.debug("NIPCA received: %s", line)
-                    self._events.update(self._parse_line(line))
+                self._check_response(response)
+                pending = ""
+                # Lines arriving in one chunk are applied as a single update
+                async for chunk in response.aiter_text():
+                    *lines, pending = (pending + chunk).split("\n")
+                    if len(pending) > CGI_MAX_SIZE:
+                        pending = ""
+                    if items := self._parse_lines(lines):
+                        self._receive_events(items)
+                        received = True
+                        self._stream_failures = 0
+                if items := self._parse_lines((pending,)):
+                    self._receive_events(items)
+                    received = True
         except CancelledError:
             _LOGGER.info("NIPCA listener task canceled")
+            return False
         except (ConnectionError, ClosedResourceError):
             _LOGGER.warning("NIPCA listener connection error")
         except (TimeoutError, ReadTimeout):
@@ -168,5 +895,8 @@ class NipcaDevice:
         except Exception as error:
             _LOGGER.error("NIPCA listener unknown error: %s", error)
         else:
+            if not received:
+                self._stream_failures += 1
             return True
+        self._stream_failures += 1
         return False
@@ -0,0 +1,92 @@
+"""NIPCA integration services."""
+import asyncio
+import logging
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_DEVICE_ID, CONF_NAME
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from httpx import HTTPError
+
+from .const import (
+    ATTR_CGI,
+    ATTR_PARAMETERS,
+    FLEET_WORKERS,
+    NIPCA_DOMAIN,
+    SERVICE_SET_PARAMETERS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SET_PARAMETERS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_CGI, default="config/motion.cgi"): cv.string,
+        vol.Required(ATTR_PARAMETERS): vol.Schema({cv.string: cv.string}),
+    }
+)
+
+
+def _get_devices(hass: HomeAssistant, device_ids: list | None) -> dict:
+    """Return the NIPCA devices of the selected registry devices, or all."""
+    devices = hass.data.get(NIPCA_DOMAIN, {})
+    if not device_ids:
+        return dict(devices)
+
+    registry = dr.async_get(hass)
+    entry_ids = set()
+    for device_id in device_ids:
+        if device_entry := registry.async_get(device_id):
+            entry_ids.update(
+                identifier
+                for domain, identifier in device_entry.identifiers
+                if domain == NIPCA_DOMAIN
+            )
+    return {
+        entry_id: device
+        for entry_id, device in devices.items()
+        if entry_id in entry_ids
+    }
+
+
+async def async_set_parameters(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Apply a parameter set to many cameras with a bounded number of workers."""
+    cgi = call.data[ATTR_CGI]
+    parameters = call.data[ATTR_PARAMETERS]
+    semaphore = asyncio.Semaphore(FLEET_WORKERS)
+
+    async def apply(device):
+        async with semaphore:
+            try:
+                return await device.async_set_parameters(cgi, parameters)
+            except (ConnectionError, HTTPError) as error:
+                _LOGGER.warning("NIPCA set parameters error: %s", error)
+                return {"success": False, "error": str(error)}
+
+    devices = _get_devices(hass, call.data.get(ATTR_DEVICE_ID))
+    results = await asyncio.gather(*(apply(device) for device in devices.values()))
+    return {
+        "devices": {
+            entry_id: {"name": device.config.get(CONF_NAME), **result}
+            for (entry_id, device), result in zip(devices.items(), results)
+        }
+    }
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    async def handle_set_parameters(call: ServiceCall) -> ServiceResponse:
+        return await async_set_parameters(hass, call)
+
+    hass.services.async_register(
+        NIPCA_DOMAIN,
+        SERVICE_SET_PARAMETERS,
+        handle_set_parameters,
+        schema=SET_PARAMETERS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
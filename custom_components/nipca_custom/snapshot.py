@@ -0,0 +1,61 @@
+"""Still image cache of a NIPCA camera."""
+from collections import OrderedDict
+import io
+from time import monotonic
+
+RESIZED_QUALITY = 80
+
+
+class SnapshotCache:
+    """Hold the latest still image fetched from a camera and its resized copies."""
+
+    def __init__(self, max_variants: int = 8) -> None:
+        self.image = None
+        self.updated = 0.0
+        self.max_variants = max_variants
+        self._variants = OrderedDict()
+
+    def get(self, max_age=None):
+        """Return the cached image if it is not older than max_age seconds."""
+        if self.image is None:
+            return None
+        if max_age is not None and monotonic() - self.updated > max_age:
+            return None
+        return self.image
+
+    def set(self, image):
+        self.image = image
+        self.updated = monotonic()
+        self._variants.clear()
+
+    def get_variant(self, size):
+        if (image := self._variants.get(size)) is not None:
+            self._variants.move_to_end(size)
+        return image
+
+    def set_variant(self, source, size, image):
+        """Store a resized copy unless the source image was replaced meanwhile."""
+        if source is not self.image:
+            return
+        self._variants[size] = image
+        if len(self._variants) > self.max_variants:
+            self._variants.popitem(last=False)
+
+
+def resize_image(image: bytes, width: int | None, height: int | None) -> bytes:
+    """Downscale a JPEG to fit width x height, to be run in an executor.
+
+    Draft mode lets the decoder scale by a power of two while decoding, so
+    large frames are never fully decoded for small tiles.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image)) as source:
+        size = (width or source.width, height or source.height)
+        if size[0] >= source.width and size[1] >= source.height:
+            return image
+        source.draft("RGB", size)
+        source.thumbnail(size)
+        output = io.BytesIO()
+        source.convert("RGB").save(output, format="JPEG", quality=RESIZED_QUALITY)
+    return output.getvalue()
@@ -9,3 +9,19 @@ TEST_URL_PATTERN = r"http:\/\/test\.local\/.*"
 def auto_enable_custom_integrations(enable_custom_integrations):
     """Enable custom integrations defined in the test dir."""
     yield
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--soak", action="store_true", default=False, help="run the soak tests"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the long soak tests unless --soak is given."""
+    if config.getoption("--soak"):
+        return
+    skip_soak = pytest.mark.skip(reason="needs --soak")
+    for item in items:
+        if "soak" in item.keywords:
+            item.add_marker(skip_soak)
@@ -18,13 +18,14 @@ from homeassistant.const import (
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from pytest_httpx import IteratorStream
 
-from custom_components.nipca_custom.binary_sensor import NipcaMotionSensor, get_sensors
+from custom_components.nipca_custom.binary_sensor import NipcaMotionSensor
 from custom_components.nipca_custom.const import (
     COMMON_INFO,
     MOTION_INFO,
     NOTIFY_STREAM,
     STREAM_INFO,
 )
+from custom_components.nipca_custom.model import get_sensors
 from custom_components.nipca_custom.nipca import NipcaDevice
 
 from tests.conftest import TEST_URL
@@ -45,7 +45,7 @@ async def test_validate_auth_invalid(httpx_mock, hass):
 
 
 @pytest.mark.asyncio
-@patch("custom_components.nipca_custom.config_flow.DLinkUPNPProfile.async_discover")
+@patch("custom_components.nipca_custom.discovery.DLinkUPNPProfile.async_discover")
 async def test_flow_user_init(async_discover, hass):
     """Test the initialization of the form in the first step of the config flow."""
     async_discover.return_value = [{"LOCATION": "test"}]
@@ -0,0 +1,70 @@
+"""Tests for the config entry diagnostics."""
+import pytest
+
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.const import (
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_TIMEOUT,
+    CONF_URL,
+    CONF_USERNAME,
+)
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.nipca_custom.const import (
+    CONF_ATTRIBUTES,
+    NIPCA_DOMAIN,
+    STILL_IMAGE,
+)
+from custom_components.nipca_custom.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.nipca_custom.nipca import NipcaDevice
+
+from tests.conftest import TEST_URL
+
+ATTRIBUTES = {"macaddr": "B0:C5:54:16:A5:21", "name": "Workshop"}
+
+
+@pytest.mark.asyncio
+async def test_config_entry_diagnostics(httpx_mock, hass):
+    """Test credentials are redacted and the connection counters reported."""
+    data = {
+        CONF_URL: TEST_URL,
+        CONF_NAME: "test",
+        CONF_USERNAME: "admin",
+        CONF_PASSWORD: "secret",
+        CONF_ATTRIBUTES: ATTRIBUTES,
+    }
+    entry = MockConfigEntry(domain=NIPCA_DOMAIN, data=data, options={CONF_TIMEOUT: 3})
+    entry.add_to_hass(hass)
+    device = NipcaDevice(hass, dict(data), entry.entry_id)
+    device.url = "https://test.local"
+    device.update_attributes(ATTRIBUTES)
+    hass.data[NIPCA_DOMAIN] = {entry.entry_id: device}
+
+    httpx_mock.add_response(url=STILL_IMAGE.format(device.url), content=b"jpeg")
+    await device.request(device.still_image_url)
+    # The mocked transport opens no connection, trace the one a camera would
+    await device._trace_connection("connection.connect_tcp.complete", {})
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["entry"] == {
+        "data": {
+            CONF_URL: REDACTED,
+            CONF_NAME: "test",
+            CONF_USERNAME: REDACTED,
+            CONF_PASSWORD: REDACTED,
+        },
+        "options": {CONF_TIMEOUT: 3},
+    }
+    assert diagnostics["attributes"] == {"macaddr": REDACTED, "name": "Workshop"}
+    assert diagnostics["device"]["https"]
+    assert not diagnostics["device"]["available"]
+    assert diagnostics["connections"] == {
+        "requests": 1,
+        "connections": 1,
+        "tls_handshakes": 0,
+        "tls_resumed": 0,
+    }
+    await device.async_stop()
@@ -0,0 +1,47 @@
+"""Tests for the frame buffer module."""
+from custom_components.nipca_custom.framebuffer import (
+    FrameBuffer,
+    MjpegFrameParser,
+    write_clip,
+)
+
+FRAME = b"\xff\xd8jpeg\xff\xd9"
+
+
+def test_parser_splits_multipart_stream():
+    """Test frames split across chunks and boundaries are reassembled."""
+    parser = MjpegFrameParser(1024)
+    part = b"--boundary\r\nContent-Type: image/jpeg\r\n\r\n"
+    data = part + FRAME + b"\r\n" + part + FRAME + b"\r\n"
+    frames = []
+    for i in range(0, len(data), 7):
+        frames.extend(parser.feed(data[i : i + 7]))
+    assert frames == [FRAME, FRAME]
+
+
+def test_parser_drops_oversized_frame():
+    """Test a frame without end marker does not grow the buffer unbounded."""
+    parser = MjpegFrameParser(16)
+    assert parser.feed(b"\xff\xd8" + b"x" * 32) == []
+    assert parser.feed(FRAME) == [FRAME]
+
+
+def test_frame_buffer_bounds():
+    """Test frames are evicted by age and by total size."""
+    buffer = FrameBuffer(seconds=2, max_bytes=len(FRAME) * 3)
+    for timestamp in range(5):
+        buffer.append(FRAME, timestamp)
+    assert len(buffer) == 3
+    assert buffer.frames(since=3) == [FRAME]
+
+    buffer.max_bytes = len(FRAME)
+    buffer.append(FRAME, 5)
+    assert len(buffer) == 1
+    assert buffer.size == len(FRAME)
+
+
+def test_write_clip(tmp_path):
+    """Test frames are written sequentially to the clip file."""
+    path = tmp_path / "clips" / "clip.mjpeg"
+    write_clip(str(path), [FRAME, FRAME])
+    assert path.read_bytes() == FRAME * 2
@@ -0,0 +1,267 @@
+"""Tests for the integration setup and unload."""
+import asyncio
+import re
+import httpx
+import pytest
+
+from datetime import timedelta
+from types import SimpleNamespace
+from homeassistant.const import (
+    CONF_AUTHENTICATION,
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    CONF_TIMEOUT,
+    CONF_URL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+    EVENT_HOMEASSISTANT_STOP,
+    HTTP_BASIC_AUTHENTICATION,
+    STATE_UNAVAILABLE,
+)
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.nipca_custom import async_ssdp_discovered
+from custom_components.nipca_custom.const import (
+    COMMON_INFO,
+    CONF_ATTRIBUTES,
+    NIPCA_DOMAIN,
+    NOTIFY_STREAM,
+)
+
+from tests.conftest import TEST_URL, TEST_URL_PATTERN
+from tests.test_binary_sensor import COMMON_INFO_LINES, STREAM_LINES, URL_INFO_LINES
+
+# Every CGI but the notify stream, which the tests serve themselves
+OTHER_CGI_PATTERN = r"http:\/\/test\.local\/(?!config\/notify_stream\.cgi).*"
+
+ENTRY_DATA = {
+    CONF_URL: TEST_URL,
+    CONF_AUTHENTICATION: HTTP_BASIC_AUTHENTICATION,
+    CONF_USERNAME: "test",
+    CONF_PASSWORD: "test",
+    CONF_VERIFY_SSL: False,
+    CONF_NAME: "NIPCA Custom",
+    CONF_SCAN_INTERVAL: 10,
+}
+
+
+class TrackedStream(httpx.AsyncByteStream):
+    """Notify stream that stays open like a camera and counts connections."""
+
+    opened = 0
+
+    def __init__(self):
+        TrackedStream.opened += 1
+
+    async def __aiter__(self):
+        yield STREAM_LINES
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        TrackedStream.opened -= 1
+
+
+async def wait_until(predicate):
+    """Wait for a condition reached by tasks the test cannot await."""
+    for _ in range(100):
+        if predicate():
+            return
+        await asyncio.sleep(0.05)
+    assert predicate()
+
+
+def listener_tasks():
+    return [
+        task
+        for task in asyncio.all_tasks()
+        if task.get_name().startswith("nipca_") and not task.done()
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reload_releases_listeners(httpx_mock, hass):
+    """Test no listener tasks, streams or bus handlers survive reloads."""
+    TrackedStream.opened = 0
+    httpx_mock.add_response(url=TEST_URL, text=URL_INFO_LINES, is_reusable=True)
+    httpx_mock.add_response(
+        url=COMMON_INFO.format(TEST_URL), text=COMMON_INFO_LINES, is_reusable=True
+    )
+    httpx_mock.add_callback(
+        lambda request: httpx.Response(200, stream=TrackedStream()),
+        url=NOTIFY_STREAM.format(TEST_URL),
+        is_reusable=True,
+    )
+    httpx_mock.add_response(url=re.compile(OTHER_CGI_PATTERN), is_reusable=True)
+
+    config_entry = MockConfigEntry(domain=NIPCA_DOMAIN, data=ENTRY_DATA)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    await wait_until(lambda: TrackedStream.opened == 1)
+    stop_listeners = hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_STOP, 0)
+
+    for _ in range(5):
+        assert await hass.config_entries.async_reload(config_entry.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert len(listener_tasks()) <= 1
+        assert TrackedStream.opened <= 1
+        # The reloaded entry reconnects its own listener
+        await wait_until(lambda: TrackedStream.opened == 1)
+        assert len(listener_tasks()) == 1
+
+    assert hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_STOP, 0) == stop_listeners
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert listener_tasks() == []
+    assert TrackedStream.opened == 0
+    assert config_entry.entry_id not in hass.data[NIPCA_DOMAIN]
+
+
+@pytest.mark.asyncio
+async def test_options_update_applied_in_place(httpx_mock, hass):
+    """Test options changes are applied to the live device without a reload."""
+    httpx_mock.add_response(url=TEST_URL, text=URL_INFO_LINES, is_reusable=True)
+    httpx_mock.add_response(url=re.compile(TEST_URL_PATTERN), is_reusable=True)
+
+    config_entry = MockConfigEntry(domain=NIPCA_DOMAIN, data=ENTRY_DATA)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    device = hass.data[NIPCA_DOMAIN][config_entry.entry_id]
+
+    hass.config_entries.async_update_entry(
+        config_entry, options={CONF_SCAN_INTERVAL: 30, CONF_TIMEOUT: 3}
+    )
+    await hass.async_block_till_done()
+    assert hass.data[NIPCA_DOMAIN][config_entry.entry_id] is device
+    assert device.timeout == 3
+    assert device._coordinator.update_interval == timedelta(seconds=30)
+
+    hass.config_entries.async_update_entry(
+        config_entry, data={**ENTRY_DATA, CONF_PASSWORD: "changed"}
+    )
+    await hass.async_block_till_done()
+    assert hass.data[NIPCA_DOMAIN][config_entry.entry_id] is not device
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_ssdp_moves_device(httpx_mock, hass):
+    """Test an SSDP announcement of the same camera updates its URL."""
+    TrackedStream.opened = 0
+    httpx_mock.add_response(url=TEST_URL, text=URL_INFO_LINES, is_reusable=True)
+    httpx_mock.add_response(
+        url=COMMON_INFO.format(TEST_URL), text=COMMON_INFO_LINES, is_reusable=True
+    )
+    for url in (TEST_URL, "http://moved.local"):
+        httpx_mock.add_callback(
+            lambda request: httpx.Response(200, stream=TrackedStream()),
+            url=NOTIFY_STREAM.format(url),
+        )
+    httpx_mock.add_response(url=re.compile(OTHER_CGI_PATTERN), is_reusable=True)
+
+    config_entry = MockConfigEntry(domain=NIPCA_DOMAIN, data=ENTRY_DATA)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    device = hass.data[NIPCA_DOMAIN][config_entry.entry_id]
+    device.udn = "uuid:camera"
+    await wait_until(lambda: TrackedStream.opened == 1)
+
+    other = SimpleNamespace(
+        ssdp_location="http://other.local/rootDesc.xml", upnp={"UDN": "uuid:other"}
+    )
+    await async_ssdp_discovered(hass, config_entry, other, None)
+    assert device.url == TEST_URL
+
+    moved = SimpleNamespace(
+        ssdp_location="http://moved.local/rootDesc.xml",
+        upnp={"UDN": "uuid:camera", "presentationURL": "http://moved.local"},
+    )
+    await async_ssdp_discovered(hass, config_entry, moved, None)
+    await hass.async_block_till_done()
+    assert device.url == "http://moved.local"
+    assert config_entry.data[CONF_URL] == "http://moved.local/rootDesc.xml"
+    assert hass.data[NIPCA_DOMAIN][config_entry.entry_id] is device
+
+    # The listener moved with the camera, the old stream is closed
+    await wait_until(
+        lambda: httpx_mock.get_request(url=NOTIFY_STREAM.format("http://moved.local"))
+    )
+    await wait_until(lambda: TrackedStream.opened == 1)
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert TrackedStream.opened == 0
+
+
+@pytest.mark.asyncio
+async def test_ssdp_location_error_retried(httpx_mock, hass):
+    """Test a location that cannot be read is not kept and is tried again."""
+    httpx_mock.add_response(url=TEST_URL, text=URL_INFO_LINES, is_reusable=True)
+    httpx_mock.add_response(url=re.compile(TEST_URL_PATTERN), is_reusable=True)
+    httpx_mock.add_exception(
+        url="http://moved.local/rootDesc.xml",
+        exception=httpx.ConnectTimeout("down"),
+    )
+    httpx_mock.add_response(
+        url="http://moved.local/rootDesc.xml",
+        text="<root><device><presentationURL>http://moved.local</presentationURL>"
+        "</device></root>",
+    )
+    httpx_mock.add_response(
+        url=re.compile(r"http:\/\/moved\.local\/.*"), is_reusable=True, is_optional=True
+    )
+
+    config_entry = MockConfigEntry(domain=NIPCA_DOMAIN, data=ENTRY_DATA)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    device = hass.data[NIPCA_DOMAIN][config_entry.entry_id]
+    device.udn = "uuid:camera"
+    device.online = False
+
+    moved = SimpleNamespace(
+        ssdp_location="http://moved.local/rootDesc.xml", upnp={"UDN": "uuid:camera"}
+    )
+    await async_ssdp_discovered(hass, config_entry, moved, None)
+    assert device.url == TEST_URL
+    assert device.config[CONF_URL] == ENTRY_DATA[CONF_URL]
+    assert config_entry.data[CONF_URL] == ENTRY_DATA[CONF_URL]
+    assert not device.online
+
+    await async_ssdp_discovered(hass, config_entry, moved, None)
+    await hass.async_block_till_done()
+    assert device.url == "http://moved.local"
+    assert device.online
+    assert config_entry.data[CONF_URL] == "http://moved.local/rootDesc.xml"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_setup_does_not_wait_for_camera(httpx_mock, hass):
+    """Test entities are added from cached attributes while the camera is down."""
+    httpx_mock.add_exception(url=TEST_URL, exception=httpx.ConnectTimeout("down"))
+
+    config_entry = MockConfigEntry(
+        domain=NIPCA_DOMAIN,
+        data={
+            **ENTRY_DATA,
+            CONF_ATTRIBUTES: {"macaddr": "B0:C5:54:16:A5:21", "name": "Workshop"},
+        },
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    device = hass.data[NIPCA_DOMAIN][config_entry.entry_id]
+    assert not device.available
+    state = hass.states.get("binary_sensor.b0_c5_54_16_a5_21_md1_sensor")
+    assert state is not None
+    assert state.state == STATE_UNAVAILABLE
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
@@ -0,0 +1,35 @@
+"""Tests for the typed device model."""
+from custom_components.nipca_custom.model import NipcaModel
+
+
+def test_model_from_attributes():
+    """Test the derived values are computed once from the attributes."""
+    model = NipcaModel.from_attributes(
+        {
+            "name": "cam",
+            "macaddr": "B0.C5.54.16.A5.21",
+            "pir": "yes",
+            "inputs": "1",
+            "vprofilenum": "2",
+            "vprofile1": "MJPEG",
+            "vprofile2": "H.264",
+            "vprofileurl1": "/video/mjpg.cgi",
+            "motiondetectionenable": "1",
+        }
+    )
+
+    assert model.mjpeg_path == "/video/mjpg.cgi"
+    assert model.rtsp_profile == 2
+    assert model.motion_detection_enabled
+    assert list(model.sensors) == ["md1", "pir", "input1"]
+    assert model.sensors["pir"].device_class == "sound"
+    assert model.sensors["pir"].unique_id == "B0_C5_54_16_A5_21_pir_sensor"
+    assert model.sensors["pir"].name == "cam pir sensor"
+
+
+def test_model_empty():
+    """Test a model without attributes still has the motion sensor."""
+    model = NipcaModel.from_attributes({})
+    assert list(model.sensors) == ["md1"]
+    assert not model.motion_detection_enabled
+    assert model.rtsp_profile is None
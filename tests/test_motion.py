@@ -0,0 +1,126 @@
+"""Tests for the software motion detection module."""
+import asyncio
+import io
+import logging
+import pytest
+
+from PIL import Image
+from homeassistant.const import CONF_NAME, CONF_URL, STATE_OFF, STATE_ON
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from pytest_httpx import IteratorStream
+
+from custom_components.nipca_custom.binary_sensor import NipcaMotionSensor
+from custom_components.nipca_custom.const import (
+    CONF_SOFTWARE_MOTION,
+    NOTIFY_BATCH_WINDOW,
+    STILL_IMAGE,
+)
+from custom_components.nipca_custom.motion import (
+    detect_motion,
+    get_motion_analyzer,
+    parse_mask,
+)
+from custom_components.nipca_custom.nipca import NipcaDevice
+
+from tests.conftest import TEST_URL
+
+
+def make_jpeg(box=None):
+    image = Image.new("L", (640, 480))
+    if box:
+        image.paste(255, box)
+    output = io.BytesIO()
+    image.save(output, format="JPEG")
+    return output.getvalue()
+
+
+def test_parse_mask():
+    """Test the mask is padded and truncated to the block grid."""
+    assert parse_mask(None) == (False,) * 25
+    assert parse_mask("1" + "0" * 30) == (True,) + (False,) * 24
+
+
+def test_detect_motion():
+    """Test frame differences are detected and masked blocks are ignored."""
+    still, moved = make_jpeg(), make_jpeg((0, 0, 256, 192))
+    no_mask = parse_mask("")
+
+    [(frame, detected)] = detect_motion([(still, None, no_mask, 50)])
+    assert not detected
+
+    [(_, detected)] = detect_motion([(moved, frame, no_mask, 50)])
+    assert detected
+
+    [(_, detected)] = detect_motion([(moved, frame, parse_mask("1100011"), 50)])
+    assert not detected
+
+
+@pytest.mark.asyncio
+async def test_motion_analyzer_drives_md1(httpx_mock, hass):
+    """Test the analyzer samples the small profile stream and sets md1."""
+    still, moved = make_jpeg(), make_jpeg((0, 0, 256, 192))
+    httpx_mock.add_response(
+        url=f"{TEST_URL}/video/mjpg.cgi?profileid=2",
+        stream=IteratorStream([b"--b\r\n" + still]),
+    )
+    # Motion and pir prefetch a snapshot for the camera entity
+    httpx_mock.add_response(
+        url=STILL_IMAGE.format(TEST_URL), content=still, is_reusable=True
+    )
+
+    device = NipcaDevice(
+        hass, {CONF_URL: TEST_URL, CONF_NAME: "test", CONF_SOFTWARE_MOTION: True}
+    )
+    device.url = TEST_URL
+    device.update_attributes(
+        {
+            "vprofilenum": "2",
+            "vprofile1": "MJPEG",
+            "vprofileurl1": "/video/mjpg.cgi?profileid=1",
+            "vprofileres1": "1280x720",
+            "vprofile2": "MJPEG",
+            "vprofileurl2": "/video/mjpg.cgi?profileid=2",
+            "vprofileres2": "320x240",
+        }
+    )
+    coordinator = DataUpdateCoordinator(
+        hass,
+        logging.getLogger(__name__),
+        name="motion_sensor",
+        update_method=device.update_motion_sensors,
+    )
+    device._coordinator = coordinator
+    sensor = NipcaMotionSensor(hass, device, coordinator, "md1", "motion")
+
+    analyzer = get_motion_analyzer(hass)
+    device.start_software_motion()
+    while device._motion_frame is None:
+        await asyncio.sleep(0.01)
+
+    await analyzer._async_analyze()
+    assert device._motion_frame is None
+    assert device._events["md1"] == STATE_OFF
+
+    # A tick arriving while a batch runs is skipped
+    device._motion_frame = moved
+    analyzer._running = True
+    await analyzer._async_analyze()
+    assert device._motion_frame is moved
+    analyzer._running = False
+
+    await analyzer._async_analyze()
+    await asyncio.sleep(NOTIFY_BATCH_WINDOW * 2)
+    assert device._events["md1"] == STATE_ON
+    assert sensor.is_on
+
+    # The camera's own md1 is ignored while software motion replaces it
+    device._receive_events([("md1", STATE_OFF), ("pir", STATE_ON)])
+    assert device._events["md1"] == STATE_ON
+    assert device._events["pir"] == STATE_ON
+
+    # Turning the option off stops sampling without touching the camera
+    device.apply_options({CONF_URL: TEST_URL, CONF_NAME: "test"})
+    assert not device.motion_detection_enabled
+    assert device._motion_task is None
+    assert analyzer._unsub is None
+    await device.async_stop()
@@ -1,8 +1,10 @@
 """Tests for the nipca module."""
+import asyncio
 import re
 import pytest
 
 from asyncio import CancelledError
+from unittest.mock import MagicMock
 from anyio import ClosedResourceError
 from homeassistant.const import (
     CONF_AUTHENTICATION,
@@ -14,12 +16,23 @@ from homeassistant.const import (
     HTTP_BASIC_AUTHENTICATION,
     HTTP_DIGEST_AUTHENTICATION,
 )
-from httpx import ReadTimeout
+from httpx import ConnectTimeout, PoolTimeout, ReadTimeout
+from pytest_homeassistant_custom_component.common import async_capture_events
+from pytest_httpx import IteratorStream
 
 from custom_components.nipca_custom.const import (
+    CGI_MAX_SIZE,
     COMMON_INFO,
+    CONF_EVENT_KEYS,
+    DESCRIPTION_MAX_SIZE,
     MOTION_INFO,
+    NIPCA_EVENT,
+    NOTIFY_BATCH_WINDOW,
+    NOTIFY_INFO,
     NOTIFY_STREAM,
+    NOTIFY_STREAM_RETRIES,
+    OFFLINE_FAILURES,
+    STILL_IMAGE,
     STREAM_INFO,
 )
 from custom_components.nipca_custom.nipca import NipcaDevice
@@ -98,3 +111,302 @@ async def test_nipca_listener_errors(error, httpx_mock, hass):
     device = NipcaDevice(hass, config)
     await device.update_info()
     assert await device._notify_listener() is False
+
+
+@pytest.mark.asyncio
+async def test_get_presentation_url_namespaced(httpx_mock, hass):
+    """Test presentationURL extraction from a namespaced UPnP description."""
+    httpx_mock.add_response(
+        url=TEST_URL,
+        text=(
+            '<?xml version="1.0"?>'
+            '<root xmlns="urn:schemas-upnp-org:device-1-0"><device>'
+            "<friendlyName>Workshop</friendlyName>"
+            f"<presentationURL>{TEST_URL}</presentationURL>"
+            "</device></root>"
+        ),
+    )
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL})
+    assert await device.get_presentation_url() == TEST_URL
+
+
+@pytest.mark.asyncio
+async def test_get_presentation_url_too_large(httpx_mock, hass):
+    """Test oversized UPnP descriptions are rejected."""
+    httpx_mock.add_response(
+        url=TEST_URL,
+        text="<root><device>" + " " * DESCRIPTION_MAX_SIZE + "</device></root>",
+    )
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL})
+    with pytest.raises(ConnectionError):
+        await device.get_presentation_url()
+
+
+@pytest.mark.asyncio
+async def test_update_info_keeps_used_attributes(httpx_mock, hass):
+    """Test only the attributes used by the integration are retained."""
+    httpx_mock.add_response(url=TEST_URL, text=URL_INFO_LINES)
+    httpx_mock.add_response(url=COMMON_INFO.format(TEST_URL), text=COMMON_INFO_LINES)
+    httpx_mock.add_response(url=STREAM_INFO.format(TEST_URL), text=STREAM_INFO_LINES)
+    httpx_mock.add_response(
+        url=MOTION_INFO[0].format(TEST_URL), text=CONFIG_MOTION_INFO_LINES
+    )
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL})
+    await device.update_info()
+    assert device._attributes["macaddr"] == "B0:C5:54:16:A5:21"
+    assert device._attributes["vprofileurl1"] == "/video/mjpg.cgi?profileid=1"
+    assert device._attributes["enable"] == "yes"
+    assert "model" not in device._attributes
+    assert "mbmask" not in device._attributes
+
+
+@pytest.mark.asyncio
+async def test__get_attributes_truncated(httpx_mock, hass):
+    """Test oversized CGI responses are truncated."""
+    httpx_mock.add_response(
+        url=COMMON_INFO.format(TEST_URL),
+        text="name=test\n" + "x=" + "y" * CGI_MAX_SIZE + "\nmacaddr=test\n",
+    )
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL})
+    device.url = TEST_URL
+    assert await device._get_attributes(COMMON_INFO) == {"name": "test"}
+
+
+@pytest.mark.asyncio
+async def test__get_attributes_bounds_unterminated_line(httpx_mock, hass):
+    """Test a body without newlines stops being read at the size bound."""
+    sent = 0
+
+    def chunks():
+        nonlocal sent
+        while True:
+            sent += 1
+            yield b"y" * 1024
+
+    httpx_mock.add_response(
+        url=COMMON_INFO.format(TEST_URL), stream=IteratorStream(chunks())
+    )
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL})
+    device.url = TEST_URL
+    assert await device._get_attributes(COMMON_INFO) == {}
+    assert sent == CGI_MAX_SIZE // 1024 + 1
+
+
+@pytest.mark.asyncio
+async def test_nipca_listener_falls_back_to_polling(httpx_mock, hass):
+    """Test the listener polls the notify CGI while the stream is unavailable."""
+    httpx_mock.add_response(
+        url=NOTIFY_STREAM.format(TEST_URL), status_code=404, is_reusable=True
+    )
+    httpx_mock.add_response(
+        url=NOTIFY_INFO.format(TEST_URL), text="md1=on\n", is_reusable=True
+    )
+    # Motion prefetches a snapshot for the camera entity
+    httpx_mock.add_response(url=STILL_IMAGE.format(TEST_URL), content=b"jpeg")
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL, CONF_NAME: "test"})
+    device.url = TEST_URL
+    for _ in range(NOTIFY_STREAM_RETRIES):
+        assert await device._notify_listener() is False
+    assert device.stream_unavailable
+
+    device.create_listener_task(hass)
+    while "md1" not in device._events:
+        await asyncio.sleep(0.1)
+    assert device._events["md1"] == "on"
+    if device._snapshot_task:
+        await device._snapshot_task
+    assert device.snapshot.get() == b"jpeg"
+    await device.async_stop()
+
+
+@pytest.mark.asyncio
+async def test_nipca_listener_follows_users(httpx_mock, hass):
+    """Test the listener runs only while entities use it."""
+    httpx_mock.add_response(url=re.compile(TEST_URL_PATTERN), is_reusable=True)
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL, CONF_NAME: "test"})
+    device.url = TEST_URL
+    await device.update_info()
+    await device.update_motion_sensors()
+    assert device._listener is None
+
+    device.acquire_listener()
+    device.acquire_listener()
+    listener = device._listener
+    assert listener is not None
+
+    device.release_listener()
+    assert device._listener is listener
+
+    device.release_listener()
+    assert device._listener is None
+    await asyncio.wait([listener])
+    assert listener.done()
+    await device.async_stop()
+
+
+@pytest.mark.asyncio
+async def test_notify_burst_single_update(hass):
+    """Test a burst of notify events results in one coordinator update."""
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL, CONF_NAME: "test"})
+    device._coordinator = MagicMock()
+
+    device._receive_events([("md1", "off"), ("pir", "off")])
+    device._receive_events([("input1", "on")])
+    device._receive_events([("input1", "on")])
+    await asyncio.sleep(NOTIFY_BATCH_WINDOW * 2)
+
+    device._coordinator.async_set_updated_data.assert_called_once_with(
+        {"md1": "off", "pir": "off", "input1": "on"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_offline_fast_fail(httpx_mock, hass):
+    """Test an unreachable camera fails fast and serves the last snapshot."""
+    httpx_mock.add_exception(
+        url=STILL_IMAGE.format(TEST_URL),
+        exception=ConnectTimeout("down"),
+        is_reusable=True,
+    )
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL, CONF_NAME: "test"})
+    device.url = TEST_URL
+    device._probed = True
+    device.snapshot.set(b"old")
+    device.snapshot.updated -= 60
+
+    for _ in range(OFFLINE_FAILURES):
+        with pytest.raises(ConnectTimeout):
+            await device.request(device.still_image_url)
+    assert not device.available
+
+    with pytest.raises(ConnectionError):
+        await device.request(device.still_image_url)
+    assert len(httpx_mock.get_requests()) == OFFLINE_FAILURES
+    assert await device.async_camera_image() == b"old"
+
+    httpx_mock.add_response(url=COMMON_INFO.format(TEST_URL))
+    await device._async_probe_online()
+    assert device.available
+    await device.async_stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_timeout_keeps_online(httpx_mock, hass):
+    """Test waiting for a free connection does not mark the camera offline."""
+    httpx_mock.add_exception(
+        url=STILL_IMAGE.format(TEST_URL),
+        exception=PoolTimeout("busy"),
+        is_reusable=True,
+    )
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL, CONF_NAME: "test"})
+    device.url = TEST_URL
+    device._probed = True
+
+    for _ in range(OFFLINE_FAILURES):
+        with pytest.raises(PoolTimeout):
+            await device.request(device.still_image_url)
+        with pytest.raises(PoolTimeout):
+            async with device.open_stream(device.still_image_url):
+                pass
+    assert device.available
+    assert device._failures == 0
+    await device.async_stop()
+
+
+@pytest.mark.asyncio
+async def test_set_parameters(httpx_mock, hass):
+    """Test parameters are written, read back and cached."""
+    httpx_mock.add_response(
+        url=f"{MOTION_INFO[0].format(TEST_URL)}?enable=yes&sensitivity=80"
+    )
+    httpx_mock.add_response(
+        url=MOTION_INFO[0].format(TEST_URL), text="enable=yes\nsensitivity=70"
+    )
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL, CONF_NAME: "test"})
+    device.url = TEST_URL
+    result = await device.async_set_parameters(
+        "config/motion.cgi", {"enable": "yes", "sensitivity": "80"}
+    )
+
+    assert result == {"success": False, "mismatched": {"sensitivity": "70"}}
+    assert device.motion_detection_enabled
+    await device.async_stop()
+
+
+@pytest.mark.asyncio
+async def test_notify_bus_events(hass):
+    """Test only changes of the configured keys are fired on the bus."""
+    events = async_capture_events(hass, NIPCA_EVENT)
+    device = NipcaDevice(
+        hass, {CONF_URL: TEST_URL, CONF_NAME: "test", CONF_EVENT_KEYS: "Input1, led"}
+    )
+
+    device._receive_events([("input1", "on"), ("input2", "on")])
+    device._receive_events([("input1", "on")])
+    device._receive_events([("input1", "off")])
+    await hass.async_block_till_done()
+
+    assert [(e.data["key"], e.data["old"], e.data["new"]) for e in events] == [
+        ("input1", None, "on"),
+        ("input1", "on", "off"),
+    ]
+    assert events[0].data["device_id"] is None
+    await device.async_stop()
+
+
+@pytest.mark.asyncio
+async def test_https_connection_stats(hass):
+    """Test HTTPS cameras get their own client and count TLS handshakes."""
+    # The UPnP description is usually plain HTTP, the camera URL decides
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL, CONF_NAME: "test"})
+    shared = device.client
+    assert not device.https
+    device.url = "https://test.local"
+    assert device.https
+    assert device.client is not shared
+    assert device.get_request_params("https://test.local")["extensions"]
+
+    ssl_object = MagicMock(session_reused=False)
+    stream = MagicMock()
+    stream.get_extra_info.return_value = ssl_object
+    await device._trace_connection("connection.connect_tcp.complete", {})
+    await device._trace_connection(
+        "connection.start_tls.complete", {"return_value": stream}
+    )
+    assert device.connection_stats == {
+        "requests": 1,
+        "connections": 1,
+        "tls_handshakes": 1,
+        "tls_resumed": 0,
+    }
+
+    client = device.client
+    device.url = TEST_URL
+    assert device.client is shared
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert client.is_closed
+
+    device.url = "https://test.local"
+    await device.async_stop()
+    assert device.client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_motion_frame_without_mjpeg_profile(httpx_mock, hass):
+    """Test cameras without an MJPEG profile are sampled from stills."""
+    httpx_mock.add_response(url=STILL_IMAGE.format(TEST_URL), content=b"jpeg")
+
+    device = NipcaDevice(hass, {CONF_URL: TEST_URL, CONF_NAME: "test"})
+    device.url = TEST_URL
+    assert await device.async_motion_frame() == b"jpeg"
+    await device.async_stop()
@@ -0,0 +1,127 @@
+"""Tests for the integration services."""
+import asyncio
+import re
+import httpx
+import pytest
+
+from unittest.mock import patch
+from homeassistant.const import ATTR_DEVICE_ID, CONF_NAME, CONF_URL
+from homeassistant.helpers import device_registry as dr
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.nipca_custom.const import (
+    ATTR_PARAMETERS,
+    MOTION_INFO,
+    NIPCA_DOMAIN,
+    SERVICE_SET_PARAMETERS,
+)
+from custom_components.nipca_custom.nipca import NipcaDevice
+
+from tests.conftest import TEST_URL
+
+BAD_URL = "http://bad.local"
+
+
+async def setup_devices(hass):
+    """Add a reachable and an unreachable camera with registry devices."""
+    assert await async_setup_component(hass, NIPCA_DOMAIN, {})
+    registry = dr.async_get(hass)
+    devices = {}
+    for name, url in (("good", TEST_URL), ("bad", BAD_URL)):
+        entry = MockConfigEntry(domain=NIPCA_DOMAIN, title=name)
+        entry.add_to_hass(hass)
+        device = NipcaDevice(hass, {CONF_URL: url, CONF_NAME: name})
+        device.url = url
+        hass.data[NIPCA_DOMAIN][entry.entry_id] = device
+        device_entry = registry.async_get_or_create(
+            config_entry_id=entry.entry_id,
+            identifiers={(NIPCA_DOMAIN, entry.entry_id)},
+        )
+        devices[name] = (entry.entry_id, device_entry.id, device)
+    return devices
+
+
+@pytest.mark.asyncio
+async def test_set_parameters_service(httpx_mock, hass):
+    """Test the selected cameras are configured and each reports its result."""
+    httpx_mock.add_response(
+        url=f"{MOTION_INFO[0].format(TEST_URL)}?enable=yes", is_reusable=True
+    )
+    httpx_mock.add_response(
+        url=MOTION_INFO[0].format(TEST_URL), text="enable=yes\n", is_reusable=True
+    )
+    httpx_mock.add_exception(
+        url=re.compile(r"http:\/\/bad\.local\/.*"),
+        exception=httpx.ConnectTimeout("down"),
+    )
+    devices = await setup_devices(hass)
+    good_entry_id, good_device_id, good = devices["good"]
+    bad_entry_id, _, bad = devices["bad"]
+
+    response = await hass.services.async_call(
+        NIPCA_DOMAIN,
+        SERVICE_SET_PARAMETERS,
+        {ATTR_DEVICE_ID: good_device_id, ATTR_PARAMETERS: {"enable": "yes"}},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {
+        "devices": {
+            good_entry_id: {"name": "good", "success": True, "mismatched": {}}
+        }
+    }
+    assert good.motion_detection_enabled
+
+    response = await hass.services.async_call(
+        NIPCA_DOMAIN,
+        SERVICE_SET_PARAMETERS,
+        {ATTR_PARAMETERS: {"enable": "yes"}},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["devices"][good_entry_id]["success"]
+    assert response["devices"][bad_entry_id] == {
+        "name": "bad",
+        "success": False,
+        "error": "down",
+    }
+
+    await good.async_stop()
+    await bad.async_stop()
+
+
+@pytest.mark.asyncio
+async def test_set_parameters_service_bounded(hass):
+    """Test no more than FLEET_WORKERS cameras are configured at once."""
+    devices = await setup_devices(hass)
+    running = []
+    peak = 0
+
+    async def set_parameters(cgi, parameters):
+        nonlocal peak
+        running.append(cgi)
+        peak = max(peak, len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+        return {"success": True, "mismatched": {}}
+
+    with patch(
+        "custom_components.nipca_custom.services.FLEET_WORKERS", 1
+    ), patch.object(
+        devices["good"][2], "async_set_parameters", side_effect=set_parameters
+    ), patch.object(
+        devices["bad"][2], "async_set_parameters", side_effect=set_parameters
+    ):
+        response = await hass.services.async_call(
+            NIPCA_DOMAIN,
+            SERVICE_SET_PARAMETERS,
+            {ATTR_PARAMETERS: {"enable": "no"}},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert peak == 1
+    assert len(response["devices"]) == 2
+    for _, _, device in devices.values():
+        await device.async_stop()
@@ -0,0 +1,208 @@
+"""Soak tests running many cameras against a local fake server."""
+import asyncio
+import gc
+import logging
+import tracemalloc
+import pytest
+
+from aiohttp import web
+from datetime import timedelta
+from homeassistant.const import (
+    CONF_AUTHENTICATION,
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    CONF_URL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+    HTTP_BASIC_AUTHENTICATION,
+)
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.nipca_custom.const import NIPCA_DOMAIN
+
+from tests.test_binary_sensor import COMMON_INFO_LINES, STREAM_INFO_LINES
+
+CAMERAS = 8
+CYCLES = 300
+WARMUP_CYCLES = 30
+RELOAD_EVERY = 50
+SCAN_INTERVAL = 10
+MEMORY_GROWTH_LIMIT = 2 * 1024 * 1024
+
+EVENT_KEYS = ("md1", "pir", "audio_detected", "input1", "output1", "led", "irled")
+
+
+class FakeCameraServer:
+    """Serve the NIPCA CGIs of many cameras, with bursts and dropped streams."""
+
+    def __init__(self):
+        self.open_streams = 0
+        self.max_open_streams = 0
+        self.requests = 0
+        self._counter = 0
+        self.app = web.Application()
+        self.app.router.add_get("/{camera}/desc.xml", self.description)
+        self.app.router.add_get("/{camera}/common/info.cgi", self.common_info)
+        self.app.router.add_get("/{camera}/config/stream_info.cgi", self.stream_info)
+        self.app.router.add_get(
+            "/{camera}/config/notify_stream.cgi", self.notify_stream
+        )
+        self.app.router.add_get("/{camera}/config/notify.cgi", self.notify)
+        self.app.router.add_get("/{camera}/{path:.*}", self.empty)
+        self.runner = web.AppRunner(self.app)
+        self.base_url = ""
+
+    async def start(self):
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def burst(self):
+        self._counter += 1
+        state = "on" if self._counter % 2 else "off"
+        return "".join(f"{key}={state}\n" for key in EVENT_KEYS)
+
+    async def description(self, request):
+        self.requests += 1
+        camera = request.match_info["camera"]
+        return web.Response(
+            text=(
+                f"<root><device><UDN>uuid:{camera}</UDN>"
+                f"<presentationURL>{self.base_url}/{camera}</presentationURL>"
+                "</device></root>"
+            )
+        )
+
+    async def common_info(self, request):
+        self.requests += 1
+        camera = request.match_info["camera"]
+        return web.Response(
+            text=COMMON_INFO_LINES.replace("name=Workshop", f"name={camera}").replace(
+                "B0:C5:54:16:A5:21", f"B0:C5:54:16:A5:{int(camera[3:]):02d}"
+            )
+        )
+
+    async def stream_info(self, request):
+        self.requests += 1
+        return web.Response(text=STREAM_INFO_LINES)
+
+    async def notify_stream(self, request):
+        self.requests += 1
+        self._counter += 1
+        if self._counter % 7 == 0:
+            # Drop the connection like firmware that refuses long polls
+            return web.Response(status=500)
+
+        response = web.StreamResponse()
+        self.open_streams += 1
+        self.max_open_streams = max(self.max_open_streams, self.open_streams)
+        try:
+            await response.prepare(request)
+            for _ in range(3):
+                await response.write(self.burst().encode())
+                await asyncio.sleep(0.01)
+            await response.write_eof()
+        finally:
+            self.open_streams -= 1
+        return response
+
+    async def notify(self, request):
+        self.requests += 1
+        return web.Response(text=self.burst())
+
+    async def empty(self, request):
+        self.requests += 1
+        return web.Response(body=b"")
+
+
+def nipca_tasks():
+    return [
+        task
+        for task in asyncio.all_tasks()
+        if task.get_name().startswith("nipca_") and not task.done()
+    ]
+
+
+@pytest.mark.soak
+@pytest.mark.asyncio
+async def test_soak_many_cameras(hass, caplog, socket_enabled):
+    """Test memory, tasks and connections stay bounded over a long run."""
+    # Captured log records would be measured as growth, keep only errors
+    for logger in ("", "aiohttp", "httpcore", "httpx", "custom_components"):
+        caplog.set_level(logging.ERROR, logger=logger or None)
+    server = FakeCameraServer()
+    await server.start()
+
+    entries = []
+    for camera in range(CAMERAS):
+        entry = MockConfigEntry(
+            domain=NIPCA_DOMAIN,
+            title=f"cam{camera}",
+            data={
+                CONF_URL: f"{server.base_url}/cam{camera}/desc.xml",
+                CONF_AUTHENTICATION: HTTP_BASIC_AUTHENTICATION,
+                CONF_USERNAME: "test",
+                CONF_PASSWORD: "test",
+                CONF_VERIFY_SSL: False,
+                CONF_NAME: f"cam{camera}",
+                CONF_SCAN_INTERVAL: SCAN_INTERVAL,
+            },
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    now = dt_util.utcnow()
+    tracemalloc.start()
+    try:
+        for cycle in range(CYCLES):
+            if cycle == WARMUP_CYCLES:
+                caplog.clear()
+                gc.collect()
+                baseline, _ = tracemalloc.get_traced_memory()
+                baseline_tasks = len(asyncio.all_tasks())
+
+            if cycle and cycle % RELOAD_EVERY == 0:
+                for entry in entries:
+                    assert await hass.config_entries.async_reload(entry.entry_id)
+                await hass.async_block_till_done(wait_background_tasks=True)
+
+            now += timedelta(seconds=SCAN_INTERVAL)
+            async_fire_time_changed(hass, now)
+            await hass.async_block_till_done()
+            await asyncio.sleep(0.05)
+
+            assert len(nipca_tasks()) <= CAMERAS * 2
+            assert server.open_streams <= CAMERAS
+
+        caplog.clear()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert current - baseline < MEMORY_GROWTH_LIMIT
+    assert len(asyncio.all_tasks()) <= baseline_tasks + CAMERAS * 2
+    assert server.max_open_streams <= CAMERAS
+    for entry in entries:
+        device = hass.data[NIPCA_DOMAIN][entry.entry_id]
+        assert set(device._events) <= set(EVENT_KEYS)
+
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    await asyncio.sleep(0.1)
+    assert nipca_tasks() == []
+    assert server.open_streams == 0
+    await server.stop()